@@ -0,0 +1,57 @@
+"""
+Relationship loading strategies for API responses
+
+ContentResponse nests ``category`` and ``tags``; without eager loading each
+serialized item lazy-loads both (2N+1 queries per page). These option sets
+load a whole page in a fixed number of queries: many-to-one relationships via
+JOIN, collections via a single ``IN`` query.
+
+Built on call rather than at import time: creating loader options configures
+the mappers, which needs every model module imported first.
+"""
+from sqlalchemy import func, case, type_coerce
+from sqlalchemy.orm import joinedload, selectinload, undefer, with_expression
+from app.models.content import Content
+from app.db.compression import CompressedText, is_compressed
+
+def content_response_options() -> tuple:
+    """Everything ContentResponse serializes"""
+    return (
+        joinedload(Content.category),
+        selectinload(Content.tags),
+        undefer(Content.content_text),
+    )
+
+def content_fields_options(fields: set, excerpt_length: int = 0) -> tuple:
+    """Load only what a sparse ContentSummaryResponse needs"""
+    options = []
+    if "category" in fields:
+        options.append(joinedload(Content.category))
+    if "tags" in fields:
+        options.append(selectinload(Content.tags))
+    if "content_text" in fields:
+        options.append(undefer(Content.content_text))
+    if excerpt_length:
+        options.append(with_expression(Content.excerpt, excerpt_expression(excerpt_length)))
+    return tuple(options)
+
+def excerpt_expression(length: int):
+    """First ``length`` characters of content_text, cut in SQL for plain rows.
+
+    Compressed bodies can't be cut before decoding, so they come back whole
+    and the caller trims them.
+    """
+    return type_coerce(
+        case(
+            (is_compressed(Content.content_text), Content.content_text),
+            else_=func.substr(Content.content_text, 1, length),
+        ),
+        CompressedText(),
+    )
+
+def public_content_options() -> tuple:
+    """PublicContentResponse needs the owner's username and the body"""
+    return (
+        joinedload(Content.user),
+        undefer(Content.content_text),
+    )
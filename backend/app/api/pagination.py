@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token holding the sort key of the last row on
+the previous page, e.g. (created_at, id). The next page is fetched with a
+``WHERE (created_at, id) < (:created_at, :id)`` range condition instead of
+OFFSET, so every page costs the same as the first one.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Sequence
+from fastapi import HTTPException, Response
+from sqlalchemy import literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Encode the sort key values of the last row into an opaque token"""
+    payload = {"s": sort, "v": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, columns: Sequence) -> List[Any]:
+    """Decode a cursor for the sort key ``columns``, rejecting tokens issued for
+    a different sort order or whose values don't fit the columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["s"] != sort:
+            raise ValueError("cursor sort mismatch")
+        values = payload["v"]
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return [_decode_value(v, c) for v, c in zip(values, columns)]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def keyset_filter(columns: Sequence, values: Sequence[Any], descending: bool):
+    """Row-value condition selecting rows strictly after ``values`` in sort order"""
+    key = tuple_(*columns)
+    bound = tuple_(*[literal(v, c.type) for c, v in zip(columns, values)])
+    return key < bound if descending else key > bound
+
+def set_next_cursor(response: Response, sort: str, items: list, limit: int, key: Callable[[Any], Sequence[Any]]) -> None:
+    """Expose the cursor for the following page when this page is full"""
+    if items and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, key(items[-1]))
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any, column) -> Any:
+    expected = column.type.python_type
+    if expected is datetime:
+        return datetime.fromisoformat(value["dt"])
+    # bool is an int subclass, but never a valid id
+    if not isinstance(value, expected) or isinstance(value, bool):
+        raise ValueError(f"cursor value for {column.key} is not {expected.__name__}")
+    return value
@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, desc
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
-from app.db.session import get_db
+from app.db.replicas import get_async_read_db
 from app.models.user import User
 from app.models.content import Content
-from app.models.tag import Tag, content_tags
+from app.models.tag import Tag, UserTagUsage
 from app.models.category import Category
 from app.models.content_source import ContentSource
 from app.api.deps import get_current_user
+from app.api.thread_pools import pooled_route
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("heavy"))
 
 class OverviewStats(BaseModel):
     total_content: int
@@ -48,9 +49,9 @@ class AnalyticsResponse(BaseModel):
     content_over_time: List[TimeSeriesPoint]
 
 @router.get("/overview", response_model=AnalyticsResponse)
-def get_analytics_overview(
+async def get_analytics_overview(
     days: int = Query(30, ge=7, le=365),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get comprehensive analytics overview"""
@@ -60,20 +61,30 @@ def get_analytics_overview(
     start_date = now - timedelta(days=days)
 
     # Overview stats
-    total_content = db.query(Content).filter(Content.user_id == current_user.id).count()
-    total_tags = db.query(Tag).count()
-    total_categories = db.query(Category).filter(Category.user_id == current_user.id).count()
-    total_sources = db.query(ContentSource).filter(ContentSource.user_id == current_user.id).count()
+    total_content = await db.scalar(
+        select(func.count(Content.id)).where(Content.user_id == current_user.id)
+    )
+    total_tags = await db.scalar(select(func.count(Tag.id)))
+    total_categories = await db.scalar(
+        select(func.count(Category.id)).where(Category.user_id == current_user.id)
+    )
+    total_sources = await db.scalar(
+        select(func.count(ContentSource.id)).where(ContentSource.user_id == current_user.id)
+    )
 
-    content_this_week = db.query(Content).filter(
-        Content.user_id == current_user.id,
-        Content.created_at >= week_ago
-    ).count()
+    content_this_week = await db.scalar(
+        select(func.count(Content.id)).where(
+            Content.user_id == current_user.id,
+            Content.created_at >= week_ago
+        )
+    )
 
-    content_this_month = db.query(Content).filter(
-        Content.user_id == current_user.id,
-        Content.created_at >= month_ago
-    ).count()
+    content_this_month = await db.scalar(
+        select(func.count(Content.id)).where(
+            Content.user_id == current_user.id,
+            Content.created_at >= month_ago
+        )
+    )
 
     overview = OverviewStats(
         total_content=total_content,
@@ -85,44 +96,48 @@ def get_analytics_overview(
     )
 
     # Content by type
-    type_stats = db.query(
-        Content.content_type,
-        func.count(Content.id).label('count')
-    ).filter(
-        Content.user_id == current_user.id
-    ).group_by(Content.content_type).all()
+    type_stats = (await db.execute(
+        select(
+            Content.content_type,
+            func.count(Content.id).label('count')
+        ).where(
+            Content.user_id == current_user.id
+        ).group_by(Content.content_type)
+    )).all()
 
     content_by_type = [
         ContentTypeStats(content_type=t[0], count=t[1]) for t in type_stats
     ]
 
-    # Top tags (by usage count)
-    tag_stats = db.query(
-        Tag.id,
-        Tag.name,
-        func.count(content_tags.c.content_id).label('count')
-    ).join(
-        content_tags, Tag.id == content_tags.c.tag_id
-    ).join(
-        Content, Content.id == content_tags.c.content_id
-    ).filter(
-        Content.user_id == current_user.id
-    ).group_by(Tag.id, Tag.name).order_by(desc('count')).limit(10).all()
+    # Top tags (by usage count, precomputed in user_tag_usage)
+    tag_stats = (await db.execute(
+        select(
+            Tag.id,
+            Tag.name,
+            UserTagUsage.count
+        ).join(
+            UserTagUsage, UserTagUsage.tag_id == Tag.id
+        ).where(
+            UserTagUsage.user_id == current_user.id
+        ).order_by(UserTagUsage.count.desc(), Tag.id).limit(10)
+    )).all()
 
     top_tags = [
         TagStats(id=t[0], name=t[1], count=t[2]) for t in tag_stats
     ]
 
     # Top categories (by content count)
-    cat_stats = db.query(
-        Category.id,
-        Category.name,
-        func.count(Content.id).label('count')
-    ).outerjoin(
-        Content, Content.category_id == Category.id
-    ).filter(
-        Category.user_id == current_user.id
-    ).group_by(Category.id, Category.name).order_by(desc('count')).limit(10).all()
+    cat_stats = (await db.execute(
+        select(
+            Category.id,
+            Category.name,
+            func.count(Content.id).label('count')
+        ).outerjoin(
+            Content, Content.category_id == Category.id
+        ).where(
+            Category.user_id == current_user.id
+        ).group_by(Category.id, Category.name).order_by(desc('count')).limit(10)
+    )).all()
 
     top_categories = [
         CategoryStats(id=c[0], name=c[1], count=c[2]) for c in cat_stats
@@ -135,11 +150,13 @@ def get_analytics_overview(
         day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
         day_end = day_start + timedelta(days=1)
 
-        count = db.query(Content).filter(
-            Content.user_id == current_user.id,
-            Content.created_at >= day_start,
-            Content.created_at < day_end
-        ).count()
+        count = await db.scalar(
+            select(func.count(Content.id)).where(
+                Content.user_id == current_user.id,
+                Content.created_at >= day_start,
+                Content.created_at < day_end
+            )
+        )
 
         content_over_time.append(
             TimeSeriesPoint(date=day_start.strftime('%Y-%m-%d'), count=count)
@@ -154,16 +171,16 @@ def get_analytics_overview(
     )
 
 @router.get("/export")
-def export_analytics(
+async def export_analytics(
     format: str = Query("json", regex="^(json|csv)$"),
     days: int = Query(30, ge=7, le=365),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Export analytics data as JSON or CSV"""
     from fastapi.responses import Response
 
-    analytics = get_analytics_overview(days=days, db=db, current_user=current_user)
+    analytics = await get_analytics_overview(days=days, db=db, current_user=current_user)
 
     if format == "json":
         import json
@@ -6,8 +6,9 @@ from app.models.user import User
 from app.models.category import Category
 from app.schemas.content import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.api.deps import get_current_user
+from app.api.thread_pools import pooled_route
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("crud"))
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 def create_category(
@@ -1,17 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import JSONResponse
+import asyncio
+from sqlalchemy import Text, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.db.session import get_db
+from app.db.replicas import get_async_read_db
+from app.db.compression import decompress_text, ilike_matcher, is_compressed
+from app.core.config import settings
 from app.models.user import User
 from app.models.content import Content
 from app.models.tag import Tag
 from app.models.category import Category
-from app.schemas.content import ContentCreate, ContentUpdate, ContentResponse
+from app.schemas.content import (
+    ContentCreate, ContentUpdate, ContentResponse, ContentSummaryResponse,
+    SPARSE_CONTENT_FIELDS, SUMMARY_CONTENT_FIELDS,
+)
 from app.api.deps import get_current_user
-from app.websocket.manager import broadcast_content_event, WSEventType
-import asyncio
+from app.api.loading import content_response_options, content_fields_options
+from app.api.pagination import decode_cursor, keyset_filter, set_next_cursor
+from app.services.tag_usage import record_tag_usage, tag_changes
+from app.websocket.events import publish_content_event
+from app.websocket.manager import WSEventType
+from app.api.thread_pools import pooled_route
+
+router = APIRouter(route_class=pooled_route("crud"))
 
-router = APIRouter()
+def _load_for_response(db: Session, content_id: int) -> Content:
+    """Reload a content row with everything ContentResponse serializes"""
+    return db.execute(
+        select(Content).options(*content_response_options()).where(Content.id == content_id)
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+
+def _parse_fields(fields: Optional[str], excerpt_length: int) -> Optional[set]:
+    """Resolve the requested sparse fieldset; None means the full ContentResponse"""
+    if fields is None and not excerpt_length:
+        return None
+    if fields is None:
+        selected = set(SUMMARY_CONTENT_FIELDS)
+    else:
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = selected - SPARSE_CONTENT_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    selected.add("id")
+    if excerpt_length:
+        selected.add("excerpt")
+    elif "excerpt" in selected:
+        raise HTTPException(status_code=400, detail="excerpt requires excerpt_length")
+    return selected
+
+def _list_options(selected: Optional[set], excerpt_length: int) -> tuple:
+    if selected is None:
+        return content_response_options()
+    return content_fields_options(selected, excerpt_length)
+
+def _sparse_item(content: Content, selected: set, excerpt_length: int) -> dict:
+    # Only touch the selected attributes so deferred columns and relationships stay unloaded
+    data = {name: getattr(content, name) for name in selected}
+    if data.get("excerpt"):
+        data["excerpt"] = data["excerpt"][:excerpt_length]
+    return ContentSummaryResponse.model_validate(data, from_attributes=True).model_dump(mode="json", include=selected)
+
+def _content_page(response: Response, contents: List[Content], selected: Optional[set], excerpt_length: int, sort_key: str, limit: int, key):
+    """Full ContentResponse models, or a pre-serialized sparse page when fields were selected"""
+    if selected is None:
+        set_next_cursor(response, sort_key, contents, limit, key)
+        return contents
+    page = JSONResponse([_sparse_item(content, selected, excerpt_length) for content in contents])
+    set_next_cursor(page, sort_key, contents, limit, key)
+    return page
 
 @router.post("", response_model=ContentResponse, status_code=status.HTTP_201_CREATED)
 def create_content(
@@ -42,43 +102,74 @@ def create_content(
     if content_data.tag_ids:
         tags = db.query(Tag).filter(Tag.id.in_(content_data.tag_ids)).all()
         content.tags = tags
+        record_tag_usage(db, current_user.id, tag_changes([], [t.id for t in tags]))
     
     db.add(content)
     db.commit()
-    db.refresh(content)
-    
-    # Broadcast content creation event (only if event loop is running)
-    try:
-        asyncio.create_task(broadcast_content_event(
-            WSEventType.CONTENT_CREATED,
-            {
-                "id": content.id,
-                "title": content.title,
-                "content_type": content.content_type,
-                "created_at": content.created_at.isoformat()
-            },
-            current_user.id
-        ))
-    except RuntimeError:
-        # No event loop running (e.g., in tests), skip WebSocket broadcast
-        pass
+    content = _load_for_response(db, content.id)
+    
+    publish_content_event(WSEventType.CONTENT_CREATED, {
+        "id": content.id,
+        "title": content.title,
+        "content_type": content.content_type,
+        "created_at": content.created_at.isoformat()
+    }, current_user.id)
     
     return content
 
 @router.get("", response_model=List[ContentResponse])
-def list_content(
+async def list_content(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,tags"),
+    excerpt_length: int = Query(0, ge=0, le=1000, description="Include the first N characters of content_text as excerpt"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    contents = db.query(Content).filter(
+    sort_key = "created_at:desc"
+    selected = _parse_fields(fields, excerpt_length)
+    query = select(Content).options(*_list_options(selected, excerpt_length)).where(
         Content.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    return contents
+    ).order_by(Content.created_at.desc(), Content.id.desc())
+    
+    if cursor:
+        sort_columns = [Content.created_at, Content.id]
+        query = query.where(
+            keyset_filter(sort_columns, decode_cursor(cursor, sort_key, sort_columns), descending=True)
+        )
+    else:
+        query = query.offset(skip)
+    
+    result = await db.execute(query.limit(limit))
+    contents = result.scalars().all()
+    return _content_page(response, contents, selected, excerpt_length, sort_key, limit, lambda c: (c.created_at, c.id))
+
+async def _compressed_body_matches(db: AsyncSession, user_id: int, pattern: str, filters: list) -> List[int]:
+    """Ids of the user's compressed bodies matching an ILIKE pattern, which SQL can't see into.
+
+    Only rows passing the request's other filters and not already matched by
+    title are decoded, newest first and at most CONTENT_SEARCH_COMPRESSED_SCAN
+    of them, which also bounds the id list handed back to the search query.
+    """
+    raw = type_coerce(Content.content_text, Text)
+    rows = (await db.execute(
+        select(Content.id, raw)
+        .where(Content.user_id == user_id, is_compressed(Content.content_text), ~Content.title.ilike(pattern), *filters)
+        .order_by(Content.id.desc())
+        .limit(settings.CONTENT_SEARCH_COMPRESSED_SCAN)
+    )).all()
+    if not rows:
+        return []
+    matches = ilike_matcher(pattern)
+    return await asyncio.to_thread(
+        lambda: [content_id for content_id, stored in rows if matches(decompress_text(stored))]
+    )
 
 @router.get("/search", response_model=List[ContentResponse])
-def search_content(
+async def search_content(
+    response: Response,
     q: str = Query("", description="Search query for title, content, or tags"),
     category_id: Optional[int] = Query(None, description="Filter by category ID"),
     content_type: Optional[str] = Query(None, description="Filter by content type"),
@@ -87,49 +178,72 @@ def search_content(
     sort_order: str = Query("desc", description="Sort order: asc or desc"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,title,tags"),
+    excerpt_length: int = Query(0, ge=0, le=1000, description="Include the first N characters of content_text as excerpt"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Content).filter(Content.user_id == current_user.id)
+    selected = _parse_fields(fields, excerpt_length)
+    query = select(Content).options(*_list_options(selected, excerpt_length)).where(Content.user_id == current_user.id)
     
-    # Search filter
-    if q:
-        query = query.filter(
-            (Content.title.ilike(f"%{q}%")) | 
-            (Content.content_text.ilike(f"%{q}%"))
-        )
-    
-    # Category filter
+    # Category and content type filters
+    filters = []
     if category_id is not None:
-        query = query.filter(Content.category_id == category_id)
-    
-    # Content type filter
+        filters.append(Content.category_id == category_id)
     if content_type:
-        query = query.filter(Content.content_type == content_type)
+        filters.append(Content.content_type == content_type)
+    query = query.where(*filters)
     
     # Tag filter
     if tag_id is not None:
-        query = query.join(Content.tags).filter(Tag.id == tag_id)
+        query = query.join(Content.tags).where(Tag.id == tag_id)
+        filters.append(Content.tags.any(Tag.id == tag_id))
     
-    # Sorting
-    if sort_by == "title":
-        query = query.order_by(Content.title.desc() if sort_order == "desc" else Content.title.asc())
+    # Search filter; the pattern is bound as plain text, not through CompressedText
+    if q:
+        pattern = f"%{q}%"
+        condition = Content.title.ilike(pattern) | type_coerce(Content.content_text, Text).ilike(pattern)
+        if settings.CONTENT_COMPRESSION:
+            matched = await _compressed_body_matches(db, current_user.id, pattern, filters)
+            if matched:
+                condition = condition | Content.id.in_(matched)
+        query = query.where(condition)
+    
+    # Sorting, with id as a tiebreaker so the sort key is unique
+    sort_column = Content.title if sort_by == "title" else Content.created_at
+    descending = sort_order == "desc"
+    sort_key = f"{sort_column.key}:{'desc' if descending else 'asc'}"
+    if descending:
+        query = query.order_by(sort_column.desc(), Content.id.desc())
     else:
-        query = query.order_by(Content.created_at.desc() if sort_order == "desc" else Content.created_at.asc())
+        query = query.order_by(sort_column.asc(), Content.id.asc())
     
-    contents = query.offset(skip).limit(limit).all()
-    return contents
+    if cursor:
+        sort_columns = [sort_column, Content.id]
+        query = query.where(
+            keyset_filter(sort_columns, decode_cursor(cursor, sort_key, sort_columns), descending)
+        )
+    else:
+        query = query.offset(skip)
+    
+    result = await db.execute(query.limit(limit))
+    contents = result.scalars().all()
+    return _content_page(response, contents, selected, excerpt_length, sort_key, limit, lambda c: (getattr(c, sort_column.key), c.id))
 
 @router.get("/{content_id}", response_model=ContentResponse)
-def get_content(
+async def get_content(
     content_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    content = db.query(Content).filter(
-        Content.id == content_id,
-        Content.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Content).options(*content_response_options()).where(
+            Content.id == content_id,
+            Content.user_id == current_user.id
+        )
+    )
+    content = result.scalars().first()
     
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -173,10 +287,17 @@ def update_content(
     # Update tags
     if content_data.tag_ids is not None:
         tags = db.query(Tag).filter(Tag.id.in_(content_data.tag_ids)).all()
+        record_tag_usage(db, current_user.id, tag_changes([t.id for t in content.tags], [t.id for t in tags]))
         content.tags = tags
     
     db.commit()
-    db.refresh(content)
+    content = _load_for_response(db, content.id)
+    publish_content_event(WSEventType.CONTENT_UPDATED, {
+        "id": content.id,
+        "title": content.title,
+        "content_type": content.content_type,
+        "updated_at": content.updated_at.isoformat() if content.updated_at else None
+    }, current_user.id)
     return content
 
 @router.delete("/{content_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -193,6 +314,8 @@ def delete_content(
     if not content:
         raise HTTPException(status_code=404, detail="Content not found")
     
+    record_tag_usage(db, current_user.id, tag_changes([t.id for t in content.tags], []))
     db.delete(content)
     db.commit()
+    publish_content_event(WSEventType.CONTENT_DELETED, {"id": content_id}, current_user.id)
     return None
@@ -13,8 +13,9 @@ from app.schemas.content_source import (
 )
 from app.api.deps import get_current_user
 from app.services.content_import import ContentImportService
+from app.api.thread_pools import pooled_route
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("crud"))
 
 @router.post("", response_model=ContentSourceResponse, status_code=status.HTTP_201_CREATED)
 def create_content_source(
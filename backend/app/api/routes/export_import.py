@@ -7,14 +7,20 @@ import csv
 import io
 from datetime import datetime
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.user import User
 from app.models.content import Content
 from app.models.tag import Tag, content_tags
 from app.models.category import Category
 from app.api.deps import get_current_user
+from app.api.loading import content_response_options
+from app.services.tag_usage import record_tag_usage, usage_for_contents
+from app.api.thread_pools import pooled_route
+from app.websocket.events import publish_batch_event
+from app.websocket.manager import WSEventType
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("heavy"))
 
 class ExportStats(BaseModel):
     total_content: int
@@ -40,11 +46,11 @@ def export_content(
     format: str = Query("json", regex="^(json|csv|opml)$"),
     tag_ids: Optional[str] = None,
     category_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Export user's content in various formats"""
-    query = db.query(Content).filter(Content.user_id == current_user.id)
+    query = db.query(Content).options(*content_response_options()).filter(Content.user_id == current_user.id)
 
     if category_id:
         query = query.filter(Content.category_id == category_id)
@@ -170,6 +176,7 @@ async def import_content(
     imported = 0
     skipped = 0
     errors = []
+    new_items = []
 
     for item in items:
         try:
@@ -185,6 +192,7 @@ async def import_content(
                 content_type=item.get("content_type", "link")
             )
             db.add(content_item)
+            new_items.append(content_item)
             imported += 1
 
             if item.get("url"):
@@ -193,7 +201,11 @@ async def import_content(
         except Exception as e:
             errors.append(f"Error importing {item.get('title', 'item')}: {str(e)}")
 
+    # Flush for ids: reading them after the commit would reload every row
+    db.flush()
+    created_ids = [c.id for c in new_items]
     db.commit()
+    publish_batch_event(WSEventType.CONTENT_BATCH_CREATED, created_ids, current_user.id)
 
     return ImportResult(
         success=len(errors) == 0,
@@ -253,13 +265,16 @@ def bulk_add_tag(
         Content.user_id == current_user.id
     ).all()
 
-    updated = 0
+    updated_ids = []
     for content in contents:
         if tag not in content.tags:
             content.tags.append(tag)
-            updated += 1
+            updated_ids.append(content.id)
+    updated = len(updated_ids)
 
+    record_tag_usage(db, current_user.id, {tag.id: updated})
     db.commit()
+    publish_batch_event(WSEventType.CONTENT_BATCH_UPDATED, updated_ids, current_user.id, tag_added=tag_name)
 
     return {"updated": updated, "tag": tag_name}
 
@@ -270,11 +285,19 @@ def bulk_delete(
     current_user: User = Depends(get_current_user)
 ):
     """Delete multiple content items"""
-    deleted = db.query(Content).filter(
+    owned_ids = [content_id for (content_id,) in db.query(Content.id).filter(
         Content.id.in_(content_ids),
         Content.user_id == current_user.id
+    ).all()]
+    record_tag_usage(db, current_user.id, usage_for_contents(db, owned_ids))
+    # A bulk delete skips the ORM cascade, and SQLite doesn't enforce the FK one
+    db.execute(content_tags.delete().where(content_tags.c.content_id.in_(owned_ids)))
+
+    deleted = db.query(Content).filter(
+        Content.id.in_(owned_ids)
     ).delete(synchronize_session=False)
 
     db.commit()
+    publish_batch_event(WSEventType.CONTENT_BATCH_DELETED, owned_ids, current_user.id)
 
     return {"deleted": deleted}
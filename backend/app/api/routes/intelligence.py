@@ -6,9 +6,10 @@ from app.models.user import User
 from app.models.content import Content
 from app.api.deps import get_current_user
 from app.services.content_intelligence import ContentIntelligenceService
+from app.api.thread_pools import pooled_route, thread_pool
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("crud"))
 
 class TagSuggestion(BaseModel):
     tag: str
@@ -101,6 +102,7 @@ def suggest_tags_for_text(
     return {"suggestions": suggestions}
 
 @router.post("/batch-analyze", response_model=BatchAnalysisResult)
+@thread_pool("heavy")
 def batch_analyze_content(
     limit: int = 100,
     db: Session = Depends(get_db),
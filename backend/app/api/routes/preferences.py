@@ -5,8 +5,9 @@ from app.models.user import User
 from app.models.user_preferences import UserPreferences
 from app.schemas.user_preferences import UserPreferencesUpdate, UserPreferencesResponse
 from app.api.deps import get_current_user
+from app.api.thread_pools import pooled_route
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("crud"))
 
 def get_or_create_preferences(db: Session, user_id: int) -> UserPreferences:
     """Get user preferences or create with defaults"""
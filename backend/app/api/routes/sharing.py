@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import secrets
 from datetime import datetime, timezone
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.user import User
 from app.models.content import Content
 from app.api.deps import get_current_user
+from app.api.pagination import decode_cursor, keyset_filter, set_next_cursor
+from app.api.loading import public_content_options
+from app.api.thread_pools import pooled_route
 from pydantic import BaseModel
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("crud"))
 
 class ShareRequest(BaseModel):
     is_public: bool
@@ -120,14 +124,28 @@ def get_public_content(
 
 @router.get("/discover", response_model=List[PublicContentResponse])
 def discover_public_content(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; takes precedence over skip"),
+    db: Session = Depends(get_read_db)
 ):
     """Discover recently shared public content (no auth required)"""
-    contents = db.query(Content).filter(
+    sort_key = "created_at:desc"
+    query = db.query(Content).options(*public_content_options()).filter(
         Content.is_public == True
-    ).order_by(Content.created_at.desc()).offset(skip).limit(limit).all()
+    ).order_by(Content.created_at.desc(), Content.id.desc())
+
+    if cursor:
+        sort_columns = [Content.created_at, Content.id]
+        query = query.filter(
+            keyset_filter(sort_columns, decode_cursor(cursor, sort_key, sort_columns), descending=True)
+        )
+    else:
+        query = query.offset(skip)
+
+    contents = query.limit(limit).all()
+    set_next_cursor(response, sort_key, contents, limit, lambda c: (c.created_at, c.id))
 
     return [
         PublicContentResponse(
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.session import get_db
+from app.db.replicas import get_read_db
 from app.models.user import User
-from app.models.tag import Tag
-from app.schemas.content import TagCreate, TagResponse
+from app.models.tag import Tag, UserTagUsage
+from app.schemas.content import TagCreate, TagResponse, TagUsageResponse
 from app.api.deps import get_current_user
+from app.api.thread_pools import pooled_route
 
-router = APIRouter()
+router = APIRouter(route_class=pooled_route("crud"))
 
 @router.post("", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
 def create_tag(
@@ -35,6 +38,22 @@ def list_tags(
     tags = db.query(Tag).all()
     return tags
 
+@router.get("/usage", response_model=List[TagUsageResponse])
+def list_tag_usage(
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The current user's tags, most used first"""
+    rows = db.execute(
+        select(Tag.id, Tag.name, UserTagUsage.count)
+        .join(UserTagUsage, UserTagUsage.tag_id == Tag.id)
+        .where(UserTagUsage.user_id == current_user.id)
+        .order_by(UserTagUsage.count.desc(), Tag.id)
+        .limit(limit)
+    ).all()
+    return [TagUsageResponse(id=tag_id, name=name, count=count) for tag_id, name, count in rows]
+
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_tag(
     tag_id: int,
@@ -45,6 +64,7 @@ def delete_tag(
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     
+    db.execute(delete(UserTagUsage).where(UserTagUsage.tag_id == tag_id))
     db.delete(tag)
     db.commit()
     return None
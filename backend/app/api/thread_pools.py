@@ -0,0 +1,153 @@
+"""
+Named thread pools for sync route handlers
+
+FastAPI runs every sync endpoint on anyio's shared 40-thread limiter, so a few
+long exports can hold most of the threads that quick CRUD requests need.
+Routers choose a pool through their route class instead:
+
+    router = APIRouter(route_class=pooled_route("crud"))
+
+and single endpoints can opt into another pool with ``@thread_pool("heavy")``
+placed below the route decorator. Each pool has its own size and queue
+timeout; a request that waits longer than the timeout for a free thread gets
+503 instead of piling up behind the slow work.
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, status
+from fastapi.routing import APIRoute
+from app.core.config import settings
+from app.monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class ThreadPool:
+    def __init__(self, name: str, size: int, queue_timeout: float):
+        self.name = name
+        self.size = size
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Counters move from worker threads as well as the event loop
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix=f"pool-{self.name}")
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run ``func`` on this pool, or 503 if no thread frees up within queue_timeout"""
+        # Carry request-scoped context (SQL stats) into the worker thread
+        context = contextvars.copy_context()
+        queued_at = time.perf_counter()
+
+        def job():
+            wait_ms = (time.perf_counter() - queued_at) * 1000
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        with self._lock:
+            self.queued += 1
+        future = self._get_executor().submit(job)
+        result = asyncio.wrap_future(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(result), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # Only jobs still waiting for a thread can be cancelled; running ones finish
+            if not future.cancel():
+                return await result
+        with self._lock:
+            self.queued -= 1
+            self.rejected += 1
+        metrics.increment_counter('ThreadPoolRejected', {'Pool': self.name})
+        logger.warning(f"Thread pool '{self.name}' saturated, rejected request after {self.queue_timeout}s")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "size": self.size,
+                "active": self.active,
+                "queued": self.queued,
+                "utilization": round(self.active / self.size, 2),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait_ms / started, 2) if started else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 2),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+thread_pools: Dict[str, ThreadPool] = {
+    # Latency-sensitive CRUD
+    "crud": ThreadPool("crud", settings.THREADPOOL_CRUD_SIZE, settings.THREADPOOL_CRUD_QUEUE_TIMEOUT),
+    # Exports, batch analysis and other long-running work
+    "heavy": ThreadPool("heavy", settings.THREADPOOL_HEAVY_SIZE, settings.THREADPOOL_HEAVY_QUEUE_TIMEOUT),
+}
+
+def thread_pool(name: str):
+    """Run this endpoint on pool ``name`` instead of its router's default"""
+    if name not in thread_pools:
+        raise ValueError(f"Unknown thread pool: {name}")
+    def decorator(func):
+        func._thread_pool = name
+        return func
+    return decorator
+
+def _offload(func: Callable, pool: ThreadPool) -> Callable:
+    # functools.wraps keeps the signature FastAPI reads parameters from
+    @functools.wraps(func)
+    async def endpoint(**kwargs):
+        return await pool.run(func, **kwargs)
+    return endpoint
+
+def pooled_route(default_pool: str):
+    """APIRoute class that runs sync endpoints on a named pool"""
+    if default_pool not in thread_pools:
+        raise ValueError(f"Unknown thread pool: {default_pool}")
+
+    class PooledRoute(APIRoute):
+        def __init__(self, path: str, endpoint: Callable, **kwargs):
+            if not inspect.iscoroutinefunction(endpoint):
+                pool = thread_pools[getattr(endpoint, "_thread_pool", default_pool)]
+                endpoint = _offload(endpoint, pool)
+            super().__init__(path, endpoint, **kwargs)
+
+    return PooledRoute
+
+def pool_stats() -> dict:
+    return {name: pool.stats() for name, pool in thread_pools.items()}
+
+def shutdown_pools() -> None:
+    for pool in thread_pools.values():
+        pool.shutdown()
@@ -0,0 +1,87 @@
+"""
+Verified-token cache for request authentication
+
+Every authenticated request used to decode its JWT and then look the user up
+by username. The cache maps an already-verified token to a small detached
+snapshot of the user, so repeat requests with the same token skip the query.
+Entries expire after AUTH_CACHE_TTL seconds or when the token does, whichever
+is sooner, and any flushed change to a User drops that user's entries.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.models.user import User
+
+@dataclass(frozen=True)
+class Principal:
+    """Detached, read-only view of the authenticated user"""
+    id: int
+    username: str
+    email: str
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, email=user.email, created_at=user.created_at)
+
+class PrincipalCache:
+    """Bounded LRU of token -> (principal, expires_at)"""
+
+    def __init__(self, max_size: int = None, ttl: float = None):
+        self.max_size = max_size or settings.AUTH_CACHE_SIZE
+        self.ttl = settings.AUTH_CACHE_TTL if ttl is None else ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Invalidation runs from sync routes in the threadpool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, principal: Principal, token_expires_at: Optional[float] = None) -> None:
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._entries[token] = (principal, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            stale = [token for token, (principal, _) in self._entries.items() if principal.id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+principal_cache = PrincipalCache()
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
@@ -1,12 +1,89 @@
 import os
 from pydantic_settings import BaseSettings
 
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:") or url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Content Aggregation API"
     SECRET_KEY: str = "your-secret-key-change-in-production"
     DATABASE_URL: str = "sqlite:///./app.db"
+    # Async driver URL; derived from DATABASE_URL (aiosqlite/asyncpg) when empty
+    ASYNC_DATABASE_URL: str = ""
+    
+    # Read replicas: comma-separated URLs; reads use the primary when empty
+    DATABASE_REPLICA_URLS: str = ""
+    # Keep a client on the primary this long after it writes (read-your-writes)
+    REPLICA_STICKY_SECONDS: float = 5.0
+    # Skip a replica this long after it fails to connect
+    REPLICA_RETRY_SECONDS: float = 30.0
     ENVIRONMENT: str = "development"
     
+    # SQLite tuning profile (ignored for other databases)
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_POOL_SIZE: int = 10
+    SQLITE_MAINTENANCE_INTERVAL: int = 600  # seconds between PRAGMA optimize / WAL checkpoints
+    
+    # Database health sampling (served from cache by /health/detailed)
+    HEALTH_SAMPLE_INTERVAL: float = 10.0  # seconds between connectivity probes
+    HEALTH_SAMPLE_WINDOW: int = 60  # probes kept in the ring buffer
+    HEALTH_TABLE_REFRESH_INTERVAL: float = 300.0  # seconds between row-estimate refreshes
+    
+    # Thread pools for sync route handlers (see app/api/thread_pools.py)
+    THREADPOOL_CRUD_SIZE: int = 24
+    THREADPOOL_CRUD_QUEUE_TIMEOUT: float = 10.0  # seconds waiting for a thread before 503
+    THREADPOOL_HEAVY_SIZE: int = 4
+    THREADPOOL_HEAVY_QUEUE_TIMEOUT: float = 30.0
+    
+    # Password hashing (bcrypt runs on its own bounded pool)
+    BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on the next login
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32  # waiting jobs beyond the workers before 503s
+    
+    # Verified-token -> user snapshot cache (skips the per-request user lookup)
+    AUTH_CACHE_TTL: float = 60.0  # seconds; 0 disables the cache
+    AUTH_CACHE_SIZE: int = 10000  # tokens kept before least-recently-used eviction
+    
+    # SQL instrumentation
+    SLOW_QUERY_MS: float = 200.0  # statements slower than this are logged
+    N_PLUS_ONE_THRESHOLD: int = 5  # identical statement shapes per request before warning
+    
+    # Compressed storage for large content bodies (existing rows: python -m app.db.migrate recompress)
+    CONTENT_COMPRESSION: bool = False
+    CONTENT_COMPRESSION_THRESHOLD: int = 2048  # bytes; smaller bodies are stored as plain text
+    CONTENT_COMPRESSION_CODEC: str = "auto"  # zstd when the stdlib has it, else zlib
+    CONTENT_RECOMPRESSION_BATCH: int = 200  # rows per background recompression batch
+    CONTENT_SEARCH_COMPRESSED_SCAN: int = 500  # newest compressed bodies a search decodes; older ones match by title only
+    
+    # WebSocket delivery
+    WS_SEND_QUEUE_SIZE: int = 256  # outbound messages buffered per connection
+    WS_OVERFLOW_POLICY: str = "disconnect"  # or "drop": discard messages for a full queue
+    WS_MAX_ROOMS_PER_CONNECTION: int = 50
+    WS_DEFLATE_THRESHOLD: int = 1024  # msgpack.deflate frames at least this large are compressed
+    WS_MAX_INBOUND_BYTES: int = 65536  # largest client message accepted once inflated
+    WS_COALESCE_WINDOW_MS: float = 150.0  # typing/cursor updates forwarded at most once per window
+    WS_INBOUND_RATE: float = 20.0  # messages per second accepted from one connection
+    WS_INBOUND_BURST: int = 40
+    WS_EVENT_LOG_SIZE: int = 200  # recent events kept per user for resume_from
+    WS_EVENT_LOG_USERS: int = 10000
+    WS_BATCH_EVENT_SIZE: int = 500  # ids per content_batch_* event
+    WS_PING_INTERVAL: float = 30.0  # seconds without client traffic before a heartbeat is sent
+    WS_PONG_TIMEOUT: float = 10.0  # seconds to answer a heartbeat before the socket is reaped
+    WS_HEARTBEAT_TICK: float = 5.0
+    WS_BACKPLANE: str = "local"  # "postgres" shares events between workers via LISTEN/NOTIFY
+    WS_BACKPLANE_CHANNEL: str = "ws_events"
+    WS_BACKPLANE_BATCH_MS: float = 10.0  # events collected per NOTIFY batch
+    WS_BACKPLANE_RECONNECT_S: float = 2.0  # how often a lost LISTEN connection is retried
+    
     # Production database settings
     POSTGRES_HOST: str = ""
     POSTGRES_PORT: int = 5432
@@ -25,5 +102,7 @@ class Settings(BaseSettings):
         # Override DATABASE_URL for production
         if self.ENVIRONMENT == "production" and self.POSTGRES_HOST:
             self.DATABASE_URL = f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        if not self.ASYNC_DATABASE_URL:
+            self.ASYNC_DATABASE_URL = to_async_url(self.DATABASE_URL)
 
 settings = Settings()
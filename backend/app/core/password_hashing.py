@@ -0,0 +1,104 @@
+"""
+Bounded executor for bcrypt
+
+bcrypt is deliberately slow, and running it in the shared threadpool lets a
+burst of logins occupy the threads every sync route depends on. Hashing and
+verification run on a small dedicated pool instead. Once PASSWORD_HASH_WORKERS
+jobs are running and PASSWORD_HASH_QUEUE more are waiting, further requests
+are rejected with 503 straight away rather than queueing behind the storm.
+
+A job counts as pending until the pool finishes it, even if the request that
+submitted it has gone away, so abandoned logins can't free up slots while
+their bcrypt work is still occupying the pool.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+from app.monitoring.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Cost factor of a bcrypt hash ("$2b$12$...")"""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Hashes below the configured cost are upgraded; stronger ones are kept"""
+    rounds = hash_rounds(hashed_password)
+    return rounds is None or rounds < settings.BCRYPT_ROUNDS
+
+class PasswordHasher:
+    def __init__(self, workers: int = None, queue_size: int = None):
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS
+        self.queue_size = settings.PASSWORD_HASH_QUEUE if queue_size is None else queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Released from the pool's threads when a job finishes
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    async def run(self, fn: Callable, *args):
+        """Run ``fn`` on the hashing pool, or fail fast with 503 when it is saturated"""
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            metrics.increment_counter('PasswordHashRejected')
+            logger.warning(f"Password hashing saturated ({self.pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher()
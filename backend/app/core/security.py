@@ -4,9 +4,10 @@ from jose import jwt, JWTError
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_async_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
@@ -14,7 +15,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode('utf-8')
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -25,8 +26,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def authenticate_token(token: str, db: AsyncSession):
+    """Resolve a bearer token to a Principal, from cache when the token was seen recently"""
     from app.models.user import User
+    from app.core.auth_cache import Principal, principal_cache
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,36 +45,36 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    # Only verified tokens reach the cache, so a hit can't be forged
+    principal = principal_cache.get(token)
+    if principal is not None and principal.username == username:
+        return principal
+    
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
-    return user
+    
+    principal = Principal.from_user(user)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    return await authenticate_token(token, db)
 
 from fastapi import WebSocket
 
-async def get_current_user_websocket(websocket: WebSocket, token: str = None):
-    """Get current user from WebSocket connection with proper JWT validation"""
+async def get_current_user_websocket(websocket: WebSocket, token: str, db: AsyncSession):
+    """The Principal for a WebSocket's ``token`` query parameter, or None if it doesn't authenticate.
+
+    Browsers can't set headers on a WebSocket handshake, so the bearer token
+    travels as a query parameter and is validated like any other request's.
+    """
+    if not token:
+        return None
     try:
-        if not token:
-            return None
-        
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        username: str = payload.get("sub")
-        
-        if username is None:
-            return None
-            
-        from app.models.user import User
-        from app.db.session import SessionLocal
-        
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.username == username).first()
-            return user
-        finally:
-            db.close()
-            
-    except JWTError:
+        return await authenticate_token(token, db)
+    except HTTPException:
         return None
 
 def validate_websocket_origin(websocket: WebSocket) -> bool:
@@ -0,0 +1,153 @@
+"""
+Transparent compression for large text columns
+
+Values above CONTENT_COMPRESSION_THRESHOLD are compressed and stored as text
+behind a format marker: "\\x01" followed by a codec letter and the Base85
+payload. Plain values are stored unchanged, so enabling compression needs no
+schema change and old rows keep reading back as-is. A plain value that happens
+to start with the marker is stored with the "r" (raw) codec to stay
+unambiguous.
+
+Compressed bodies are opaque to SQL: substr() excerpts only see rows that are
+still stored as plain text, and LIKE searches must bind their pattern with
+``type_coerce(column, Text)`` and match compressed rows separately, after
+decoding them (see ``ilike_matcher``).
+"""
+import asyncio
+import base64
+import logging
+import re
+import zlib
+from sqlalchemy import Text, select, update, type_coerce
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+from app.core.config import settings
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
+
+logger = logging.getLogger(__name__)
+
+MARKER = "\x01"
+RAW = "r"
+ZLIB = "z"
+ZSTD = "s"
+
+def _codec() -> str:
+    codec = settings.CONTENT_COMPRESSION_CODEC
+    if codec == "auto":
+        return ZSTD if zstd else ZLIB
+    if codec == "zstd":
+        if not zstd:
+            raise RuntimeError("zstd compression requires Python 3.14 or newer")
+        return ZSTD
+    if codec == "zlib":
+        return ZLIB
+    raise ValueError(f"Unknown CONTENT_COMPRESSION_CODEC: {codec}")
+
+def compress_text(value: str) -> str:
+    """Encode a value for storage according to the current settings"""
+    if value is None:
+        return None
+    data = value.encode("utf-8")
+    if settings.CONTENT_COMPRESSION and len(data) >= settings.CONTENT_COMPRESSION_THRESHOLD:
+        codec = _codec()
+        packed = zstd.compress(data) if codec == ZSTD else zlib.compress(data, 6)
+        encoded = MARKER + codec + base64.b85encode(packed).decode("ascii")
+        # Incompressible bodies are cheaper to keep as plain text
+        if len(encoded) < len(data):
+            return encoded
+    if value.startswith(MARKER):
+        return MARKER + RAW + value
+    return value
+
+def decompress_text(stored: str) -> str:
+    """Decode a stored value, whichever format it was written in"""
+    if stored is None or not stored.startswith(MARKER):
+        return stored
+    codec, payload = stored[1:2], stored[2:]
+    if codec == RAW:
+        return payload
+    packed = base64.b85decode(payload)
+    if codec == ZLIB:
+        return zlib.decompress(packed).decode("utf-8")
+    if codec == ZSTD:
+        if not zstd:
+            raise RuntimeError("Stored value is zstd-compressed but this Python has no zstd support")
+        return zstd.decompress(packed).decode("utf-8")
+    raise ValueError(f"Unknown compressed text codec: {codec!r}")
+
+def is_compressed(column):
+    """SQL predicate matching rows stored in marker format"""
+    return type_coerce(column, Text).startswith(MARKER)
+
+def ilike_matcher(pattern: str):
+    """Python predicate with the semantics of SQL ``ILIKE pattern``"""
+    regex = "".join(
+        ".*" if char == "%" else "." if char == "_" else re.escape(char)
+        for char in pattern
+    )
+    return re.compile(regex, re.IGNORECASE | re.DOTALL).fullmatch
+
+class CompressedText(TypeDecorator):
+    """Text column that compresses large values on write and decodes on read"""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+def recompress_column(engine: Engine, table, column: str, batch_size: int = None) -> int:
+    """Rewrite stored values that don't match the current compression settings.
+
+    Walks the table by primary key in batches, so it is safe to stop and rerun;
+    compresses rows when compression is on and restores plain text when it is off.
+    A row edited between the read and the write is left alone; its new value was
+    already stored according to the current settings. Returns the number of rows
+    rewritten.
+    """
+    batch_size = batch_size or settings.CONTENT_RECOMPRESSION_BATCH
+    raw = type_coerce(table.c[column], Text)
+    # A storage rewrite is not an edit: pin onupdate columns such as updated_at
+    unchanged = {c.name: c for c in table.c if c.onupdate is not None}
+    rewritten = 0
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(table.c.id, raw).where(table.c.id > last_id, raw.is_not(None))
+                .order_by(table.c.id).limit(batch_size)
+            ).all()
+        changes = []
+        for row_id, stored in rows:
+            encoded = compress_text(decompress_text(stored))
+            if encoded != stored:
+                changes.append((row_id, stored, encoded))
+        if changes:
+            with engine.begin() as conn:
+                for row_id, stored, encoded in changes:
+                    # Only if the stored value is still the one read: an edit
+                    # committed since then must not be overwritten with the old body
+                    result = conn.execute(
+                        update(table).where(table.c.id == row_id, raw == type_coerce(stored, Text))
+                        .values({**unchanged, column: type_coerce(encoded, Text)})
+                    )
+                    rewritten += result.rowcount
+        if len(rows) < batch_size:
+            return rewritten
+        last_id = rows[-1][0]
+
+async def content_recompression_task(engine: Engine):
+    """Bring existing content bodies in line with the compression settings once at startup"""
+    from app.models.content import Content
+    try:
+        rewritten = await asyncio.to_thread(recompress_column, engine, Content.__table__, "content_text")
+        if rewritten:
+            logger.info(f"Recompressed {rewritten} content bodies")
+    except Exception as e:
+        logger.warning(f"Content recompression failed: {e}")
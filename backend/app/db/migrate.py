@@ -34,6 +34,31 @@ def create_tables():
         logger.error(f"Error creating tables: {e}")
         return False
 
+def upgrade_schema(target: int = None):
+    """Apply pending versioned migrations (online index builds on PostgreSQL)"""
+    from app.db.migrations import apply_migrations
+    try:
+        engine = create_engine(settings.DATABASE_URL)
+        applied = apply_migrations(engine, target)
+        logger.info(f"Applied migrations: {applied or 'none pending'}")
+        return True
+    except Exception as e:
+        logger.error(f"Schema upgrade failed: {e}")
+        return False
+
+def schema_status():
+    """Log applied and pending migration versions"""
+    from app.db.migrations import current_version, pending_migrations
+    try:
+        engine = create_engine(settings.DATABASE_URL)
+        logger.info(f"Current schema version: {current_version(engine)}")
+        for migration in pending_migrations(engine):
+            logger.info(f"Pending: {migration.VERSION} - {migration.DESCRIPTION}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to read schema status: {e}")
+        return False
+
 def check_database_connection():
     """Test database connection"""
     try:
@@ -46,71 +71,38 @@ def check_database_connection():
         logger.error(f"Database connection failed: {e}")
         return False
 
-def migrate_sqlite_to_postgres(sqlite_path: str):
-    """Migrate data from SQLite to PostgreSQL"""
-    import sqlite3
+def migrate_sqlite_to_postgres(sqlite_path: str, restart: bool = False, chunk_size: int = 5000, workers: int = 4):
+    """Migrate data from SQLite to PostgreSQL (streaming, resumable)"""
+    from app.db.sqlite_to_postgres import SQLiteToPostgresMigrator
     
     if not os.path.exists(sqlite_path):
         logger.warning(f"SQLite database not found at {sqlite_path}")
         return True
     
     try:
-        # Connect to SQLite
-        sqlite_conn = sqlite3.connect(sqlite_path)
-        sqlite_conn.row_factory = sqlite3.Row
-        
-        # Connect to PostgreSQL
-        pg_engine = create_engine(settings.DATABASE_URL)
+        pg_engine = create_engine(settings.DATABASE_URL, pool_size=workers, max_overflow=0)
         
         logger.info("Starting data migration from SQLite to PostgreSQL")
+        migrator = SQLiteToPostgresMigrator(sqlite_path, pg_engine, chunk_size=chunk_size, workers=workers)
+        copied = migrator.run(restart=restart)
         
-        # Define table migration order (respecting foreign keys)
-        tables_order = ['users', 'categories', 'content_sources', 'tags', 'contents', 'content_tags', 'user_preferences']
-        
-        with pg_engine.connect() as pg_conn:
-            for table_name in tables_order:
-                logger.info(f"Migrating table: {table_name}")
-                
-                # Check if table exists in SQLite
-                cursor = sqlite_conn.cursor()
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
-                if not cursor.fetchone():
-                    logger.info(f"Table {table_name} not found in SQLite, skipping")
-                    continue
-                
-                # Get data from SQLite
-                cursor.execute(f"SELECT * FROM {table_name}")
-                rows = cursor.fetchall()
-                
-                if not rows:
-                    logger.info(f"No data in table {table_name}")
-                    continue
-                
-                # Get column names
-                columns = [description[0] for description in cursor.description]
-                
-                # Clear existing data in PostgreSQL
-                pg_conn.execute(text(f"TRUNCATE TABLE {table_name} RESTART IDENTITY CASCADE"))
-                
-                # Insert data
-                placeholders = ', '.join([f':{col}' for col in columns])
-                insert_sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
-                
-                # Convert rows to dictionaries
-                data = [dict(zip(columns, row)) for row in rows]
-                
-                # Execute batch insert
-                pg_conn.execute(text(insert_sql), data)
-                pg_conn.commit()
-                
-                logger.info(f"Migrated {len(rows)} rows to {table_name}")
-        
-        sqlite_conn.close()
-        logger.info("Data migration completed successfully")
+        logger.info(f"Data migration completed successfully: {copied}")
         return True
         
     except Exception as e:
-        logger.error(f"Migration failed: {e}")
+        logger.error(f"Migration failed (rerun to resume from the last checkpoint): {e}")
+        return False
+
+def recompress_content():
+    """Rewrite stored content bodies to match the CONTENT_COMPRESSION settings"""
+    from app.db.compression import recompress_column
+    try:
+        engine = create_engine(settings.DATABASE_URL)
+        rewritten = recompress_column(engine, content.Content.__table__, "content_text")
+        logger.info(f"Rewrote {rewritten} content bodies")
+        return True
+    except Exception as e:
+        logger.error(f"Recompression failed (rerun to continue): {e}")
         return False
 
 def setup_connection_pool():
@@ -145,7 +137,10 @@ if __name__ == "__main__":
         print("Commands:")
         print("  check - Test database connection")
         print("  create - Create all tables")
-        print("  migrate <sqlite_path> - Migrate from SQLite")
+        print("  upgrade [version] - Apply pending schema migrations")
+        print("  status - Show schema migration status")
+        print("  migrate <sqlite_path> [--restart] - Migrate from SQLite (resumes unless --restart)")
+        print("  recompress - Apply CONTENT_COMPRESSION settings to existing content")
         print("  pool - Test connection pool")
         sys.exit(1)
     
@@ -159,12 +154,25 @@ if __name__ == "__main__":
         success = create_tables()
         sys.exit(0 if success else 1)
     
+    elif command == "upgrade":
+        target = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        success = upgrade_schema(target)
+        sys.exit(0 if success else 1)
+    
+    elif command == "status":
+        success = schema_status()
+        sys.exit(0 if success else 1)
+    
     elif command == "migrate":
         if len(sys.argv) < 3:
             print("Error: SQLite path required for migrate command")
             sys.exit(1)
         sqlite_path = sys.argv[2]
-        success = migrate_sqlite_to_postgres(sqlite_path)
+        success = migrate_sqlite_to_postgres(sqlite_path, restart="--restart" in sys.argv[3:])
+        sys.exit(0 if success else 1)
+    
+    elif command == "recompress":
+        success = recompress_content()
         sys.exit(0 if success else 1)
     
     elif command == "pool":
@@ -0,0 +1,97 @@
+"""
+Versioned schema migrations
+
+Each module in ``app.db.migrations.versions`` named ``vNNNN_<slug>.py`` defines
+``VERSION``, ``DESCRIPTION`` and ``upgrade(conn)``. Applied versions are
+recorded in the ``schema_migrations`` table so every migration runs once.
+Migrations that set ``ONLINE = True`` run on an AUTOCOMMIT connection, which
+lets PostgreSQL build indexes with CREATE INDEX CONCURRENTLY without locking
+writers.
+"""
+import importlib
+import logging
+import pkgutil
+import time
+from typing import List, Optional
+from sqlalchemy import MetaData, Table, Column, Integer, String, Float, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", Float, nullable=False),
+)
+
+def load_migrations() -> list:
+    """Return all migration modules sorted by version"""
+    from app.db.migrations import versions
+
+    modules = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        if info.name.startswith("v"):
+            modules.append(importlib.import_module(f"{versions.__name__}.{info.name}"))
+    return sorted(modules, key=lambda m: m.VERSION)
+
+def applied_versions(engine: Engine) -> List[int]:
+    """Versions already recorded in schema_migrations"""
+    _metadata.create_all(bind=engine, tables=[schema_migrations])
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version))]
+
+def current_version(engine: Engine) -> int:
+    versions = applied_versions(engine)
+    return versions[-1] if versions else 0
+
+def pending_migrations(engine: Engine) -> list:
+    done = set(applied_versions(engine))
+    return [m for m in load_migrations() if m.VERSION not in done]
+
+def apply_migrations(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (all when None)"""
+    applied = []
+    for migration in pending_migrations(engine):
+        if target is not None and migration.VERSION > target:
+            break
+
+        logger.info(f"Applying migration {migration.VERSION}: {migration.DESCRIPTION}")
+        if getattr(migration, "ONLINE", False):
+            with engine.connect() as conn:
+                migration.upgrade(conn.execution_options(isolation_level="AUTOCOMMIT"))
+            with engine.begin() as conn:
+                _record(conn, migration)
+        else:
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                _record(conn, migration)
+        applied.append(migration.VERSION)
+
+    return applied
+
+def _record(conn: Connection, migration) -> None:
+    conn.execute(schema_migrations.insert().values(
+        version=migration.VERSION,
+        description=migration.DESCRIPTION,
+        applied_at=time.time()
+    ))
+
+def create_index(conn: Connection, name: str, table: str, columns: List[str]) -> None:
+    """Idempotently create an index, concurrently on PostgreSQL"""
+    column_list = ", ".join(columns)
+    if conn.dialect.name == "postgresql":
+        # A failed concurrent build leaves an INVALID index behind that
+        # IF NOT EXISTS would silently accept, so drop it and rebuild
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({column_list})"))
+    else:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column_list})"))
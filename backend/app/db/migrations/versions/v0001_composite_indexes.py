@@ -0,0 +1,21 @@
+"""
+Composite indexes for the hot content, tag and import queries
+"""
+from app.db.migrations import create_index
+
+VERSION = 1
+DESCRIPTION = "Composite indexes for content listing, discover, tag joins and import logs"
+ONLINE = True
+
+INDEXES = [
+    ("ix_contents_user_id_created_at", "contents", ["user_id", "created_at"]),
+    ("ix_contents_user_id_category_id", "contents", ["user_id", "category_id"]),
+    ("ix_contents_user_id_content_type", "contents", ["user_id", "content_type"]),
+    ("ix_contents_is_public_created_at", "contents", ["is_public", "created_at"]),
+    ("ix_content_tags_tag_id_content_id", "content_tags", ["tag_id", "content_id"]),
+    ("ix_import_logs_source_id", "import_logs", ["source_id"]),
+]
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        create_index(conn, name, table, columns)
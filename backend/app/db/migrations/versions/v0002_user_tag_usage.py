@@ -0,0 +1,12 @@
+"""
+Per-user tag usage counts
+"""
+from app.models.tag import UserTagUsage
+from app.services.tag_usage import rebuild_tag_usage
+
+VERSION = 2
+DESCRIPTION = "user_tag_usage table, backfilled from content_tags"
+
+def upgrade(conn):
+    UserTagUsage.__table__.create(conn, checkfirst=True)
+    rebuild_tag_usage(conn)
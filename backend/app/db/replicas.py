@@ -0,0 +1,154 @@
+"""
+Read-replica routing
+
+Read-only routes take their session from get_read_db / get_async_read_db.
+When DATABASE_REPLICA_URLS is set those sessions are bound to a replica picked
+round-robin; a replica that fails to connect is skipped for
+REPLICA_RETRY_SECONDS and the next one (or the primary) is used instead.
+Clients that wrote within REPLICA_STICKY_SECONDS keep reading from the primary
+so they always see their own writes.
+"""
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from fastapi import Depends, Request
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from app.core.config import settings, to_async_url
+from app.db.session import get_db, get_async_db
+from app.monitoring.sql import instrument_engine
+from app.db.sqlite import is_sqlite, sqlite_engine_kwargs, sqlite_async_engine_kwargs, apply_sqlite_pragmas
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on remembered writers before expired entries are pruned
+MAX_TRACKED_WRITERS = 10000
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        if settings.ENVIRONMENT == "production":
+            pool_args = dict(pool_size=10, max_overflow=20, pool_pre_ping=True, pool_recycle=3600)
+            self.engine = create_engine(url, **pool_args)
+            self.async_engine = create_async_engine(to_async_url(url), **pool_args)
+        elif is_sqlite(url):
+            self.engine = create_engine(url, **sqlite_engine_kwargs(url))
+            self.async_engine = create_async_engine(to_async_url(url), **sqlite_async_engine_kwargs(url))
+            apply_sqlite_pragmas(self.engine)
+            apply_sqlite_pragmas(self.async_engine.sync_engine)
+        else:
+            self.engine = create_engine(url)
+            self.async_engine = create_async_engine(to_async_url(url))
+        instrument_engine(self.engine)
+        instrument_engine(self.async_engine.sync_engine)
+        self.down_until = 0.0
+
+class ReplicaRouter:
+    def __init__(self, urls: List[str], sticky_seconds: float, retry_seconds: float):
+        self.replicas = [Replica(url) for url in urls]
+        self.sticky_seconds = sticky_seconds
+        self.retry_seconds = retry_seconds
+        self._rotation = itertools.count()
+        self._recent_writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def mark_write(self, client_key: str) -> None:
+        """Pin a client to the primary for the sticky window"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._recent_writes) >= MAX_TRACKED_WRITERS:
+                self._recent_writes = {k: v for k, v in self._recent_writes.items() if v > now}
+            self._recent_writes[client_key] = now + self.sticky_seconds
+
+    def is_sticky(self, client_key: str) -> bool:
+        return self._recent_writes.get(client_key, 0.0) > time.monotonic()
+
+    def candidates(self) -> List[Replica]:
+        """Healthy replicas in round-robin order"""
+        now = time.monotonic()
+        start = next(self._rotation) % len(self.replicas)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [r for r in ordered if r.down_until <= now]
+
+    def mark_down(self, replica: Replica, error: Exception) -> None:
+        replica.down_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"Replica {replica.engine.url!r} unavailable, skipping for {self.retry_seconds}s: {error}")
+
+    def connect(self) -> Optional[Connection]:
+        """Connection to the next healthy replica, or None to use the primary"""
+        for replica in self.candidates():
+            try:
+                return replica.engine.connect()
+            except DBAPIError as e:
+                self.mark_down(replica, e)
+        return None
+
+    async def connect_async(self) -> Optional[AsyncConnection]:
+        for replica in self.candidates():
+            try:
+                return await replica.async_engine.connect()
+            except DBAPIError as e:
+                self.mark_down(replica, e)
+        return None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+replica_router = ReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    retry_seconds=settings.REPLICA_RETRY_SECONDS
+)
+
+def client_key(request: Request) -> str:
+    """Identify a client for read-your-writes stickiness"""
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+    return request.client.host if request.client else "anonymous"
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Session for read-only routes, served by a replica when one is available"""
+    connection = None
+    if replica_router.enabled and not replica_router.is_sticky(client_key(request)):
+        connection = replica_router.connect()
+
+    if connection is None:
+        yield db
+        return
+
+    replica_db = Session(bind=connection, autoflush=False)
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+        connection.close()
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Async counterpart of get_read_db"""
+    connection = None
+    if replica_router.enabled and not replica_router.is_sticky(client_key(request)):
+        connection = await replica_router.connect_async()
+
+    if connection is None:
+        yield db
+        return
+
+    replica_db = AsyncSession(bind=connection, autoflush=False, expire_on_commit=False)
+    try:
+        yield replica_db
+    finally:
+        await replica_db.close()
+        await connection.close()
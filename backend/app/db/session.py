@@ -1,8 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
 from app.core.config import settings
+from app.monitoring.sql import instrument_engine
+from app.db.sqlite import is_sqlite, sqlite_engine_kwargs, sqlite_async_engine_kwargs, apply_sqlite_pragmas
 
 # Configure engine with connection pooling for production
 if settings.ENVIRONMENT == "production":
@@ -15,13 +18,32 @@ if settings.ENVIRONMENT == "production":
         pool_recycle=3600,
         echo=False
     )
-else:
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=False
+    )
+elif is_sqlite(settings.DATABASE_URL):
+    engine = create_engine(settings.DATABASE_URL, **sqlite_engine_kwargs(settings.DATABASE_URL))
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL, **sqlite_async_engine_kwargs(settings.ASYNC_DATABASE_URL)
     )
+    apply_sqlite_pragmas(engine)
+    apply_sqlite_pragmas(async_engine.sync_engine)
+else:
+    engine = create_engine(settings.DATABASE_URL)
+    async_engine = create_async_engine(settings.ASYNC_DATABASE_URL)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async sessions keep loaded attributes after commit so results can be
+# serialized once the session has closed
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -30,3 +52,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Async counterpart of get_db for routes running on the event loop"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,75 @@
+"""
+SQLite high-throughput profile
+
+Applied to every new DBAPI connection through a connect-event hook:
+WAL journaling so readers never block behind a writer, synchronous=NORMAL
+(durable at checkpoints, safe in WAL mode), a memory-mapped read path, a
+larger page cache, in-memory temp tables and a busy timeout instead of
+immediate "database is locked" errors. A background task periodically runs
+PRAGMA optimize and a passive WAL checkpoint so the WAL file stays small.
+"""
+import asyncio
+import logging
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def is_sqlite_file(url: str) -> bool:
+    return is_sqlite(url) and ":memory:" not in url and url.split("://", 1)[-1] not in ("", "/")
+
+def sqlite_engine_kwargs(url: str) -> dict:
+    """create_engine arguments for a SQLite URL (sync driver)"""
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if is_sqlite_file(url):
+        kwargs["pool_size"] = settings.SQLITE_POOL_SIZE
+    return kwargs
+
+def sqlite_async_engine_kwargs(url: str) -> dict:
+    """create_async_engine arguments for a SQLite URL (aiosqlite driver)"""
+    return {"pool_size": settings.SQLITE_POOL_SIZE} if is_sqlite_file(url) else {}
+
+def sqlite_pragmas() -> list:
+    pragmas = [
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+    ]
+    if settings.SQLITE_WAL:
+        pragmas.insert(0, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+def apply_sqlite_pragmas(engine: Engine) -> None:
+    """Register the tuning profile on a (sync) engine; use engine.sync_engine for async engines"""
+    if not is_sqlite(str(engine.url)):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def run_sqlite_maintenance(engine: Engine) -> None:
+    """Refresh planner statistics and fold the WAL back into the database"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+        if settings.SQLITE_WAL:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(PASSIVE)")
+
+async def sqlite_maintenance_task(engine: Engine):
+    while True:
+        await asyncio.sleep(settings.SQLITE_MAINTENANCE_INTERVAL)
+        try:
+            await asyncio.to_thread(run_sqlite_maintenance, engine)
+        except Exception as e:
+            logger.warning(f"SQLite maintenance failed: {e}")
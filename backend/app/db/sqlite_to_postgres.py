@@ -0,0 +1,225 @@
+"""
+Streaming, resumable SQLite -> PostgreSQL data migration
+
+Rows are read from SQLite in rowid order with ``fetchmany`` so memory stays
+bounded by ``chunk_size``, and loaded with COPY FROM STDIN on psycopg2 targets
+(multi-row INSERTs elsewhere). Each chunk commits together with a per-table
+checkpoint row in the target database, so a failed run resumes from the last
+committed chunk instead of starting over. Tables without foreign keys between
+them are copied in parallel, one dependency level at a time. At the end
+serial sequences are moved past the copied ids and derived tables such as
+user_tag_usage are recomputed from the copied rows, since the source may
+predate them or hold stale counts.
+"""
+import io
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import MetaData, Table, Column, String, Integer, Boolean, DateTime, JSON, text, table as sql_table, column as sql_column
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.types import TypeDecorator
+from app.db.session import Base
+from app.models import user, content, tag, category, content_source, user_preferences
+
+logger = logging.getLogger(__name__)
+
+_checkpoint_metadata = MetaData()
+
+migration_checkpoints = Table(
+    "data_migration_checkpoints",
+    _checkpoint_metadata,
+    Column("table_name", String(100), primary_key=True),
+    Column("last_rowid", Integer, nullable=False, default=0),
+    Column("rows_copied", Integer, nullable=False, default=0),
+    Column("completed", Boolean, nullable=False, default=False),
+)
+
+def dependency_levels(tables: List[Table]) -> List[List[Table]]:
+    """Group tables so every table's foreign-key parents sit in an earlier level"""
+    names = {t.name for t in tables}
+    depth: Dict[str, int] = {}
+
+    def table_depth(table: Table) -> int:
+        if table.name not in depth:
+            parents = {fk.column.table for fk in table.foreign_keys if fk.column.table.name in names and fk.column.table is not table}
+            depth[table.name] = 1 + max((table_depth(p) for p in parents), default=-1)
+        return depth[table.name]
+
+    levels: Dict[int, List[Table]] = {}
+    for table in tables:
+        levels.setdefault(table_depth(table), []).append(table)
+    return [levels[i] for i in sorted(levels)]
+
+def copy_text_value(value, column: Column) -> str:
+    """Render one value in PostgreSQL COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(column.type, Boolean):
+        return "t" if value else "f"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+def bind_value(value, column: Column):
+    """Convert a raw SQLite value to what the column type expects on bind"""
+    if value is None:
+        return None
+    if isinstance(column.type, Boolean):
+        return bool(value)
+    if isinstance(column.type, JSON) and isinstance(value, str):
+        return json.loads(value)
+    if isinstance(column.type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def storage_table(table: Table, columns: List[Column]):
+    """Insert target whose TypeDecorator columns (e.g. CompressedText) bind as their
+    underlying type, so values already in storage format are copied verbatim"""
+    return sql_table(table.name, *[
+        sql_column(c.name, c.type.impl_instance if isinstance(c.type, TypeDecorator) else c.type)
+        for c in columns
+    ])
+
+class SQLiteToPostgresMigrator:
+    def __init__(self, sqlite_path: str, target_engine: Engine, chunk_size: int = 5000, workers: int = 4):
+        self.sqlite_path = sqlite_path
+        self.engine = target_engine
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.use_copy = target_engine.dialect.name == "postgresql" and target_engine.dialect.driver == "psycopg2"
+
+    def run(self, restart: bool = False) -> Dict[str, int]:
+        """Migrate every model table; returns rows copied per table"""
+        _checkpoint_metadata.create_all(bind=self.engine)
+        if restart:
+            with self.engine.begin() as conn:
+                conn.execute(migration_checkpoints.delete())
+
+        source_tables = self._source_tables()
+        tables = [t for t in Base.metadata.sorted_tables if t.name in source_tables]
+        copied: Dict[str, int] = {}
+
+        for level in dependency_levels(tables):
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                for name, rows in zip([t.name for t in level], pool.map(self.migrate_table, level)):
+                    copied[name] = rows
+
+        self.fix_sequences(tables)
+        self.rebuild_derived()
+        return copied
+
+    def migrate_table(self, table: Table) -> int:
+        """Copy one table in chunks, resuming from its checkpoint"""
+        checkpoint = self._checkpoint(table.name)
+        if checkpoint and checkpoint.completed:
+            logger.info(f"Table {table.name} already migrated ({checkpoint.rows_copied} rows), skipping")
+            return checkpoint.rows_copied
+
+        if checkpoint is None:
+            with self.engine.begin() as conn:
+                self._clear_target(conn, table)
+                conn.execute(migration_checkpoints.insert().values(
+                    table_name=table.name, last_rowid=0, rows_copied=0, completed=False
+                ))
+            last_rowid, rows_copied = 0, 0
+        else:
+            last_rowid, rows_copied = checkpoint.last_rowid, checkpoint.rows_copied
+            logger.info(f"Resuming {table.name} after rowid {last_rowid} ({rows_copied} rows done)")
+
+        source = sqlite3.connect(self.sqlite_path)
+        try:
+            source_columns = [row[1] for row in source.execute(f"PRAGMA table_info({table.name})")]
+            columns = [table.c[name] for name in source_columns if name in table.c]
+            column_list = ", ".join(f'"{c.name}"' for c in columns)
+            cursor = source.execute(
+                f"SELECT rowid, {column_list} FROM {table.name} WHERE rowid > ? ORDER BY rowid",
+                (last_rowid,)
+            )
+
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+
+                last_rowid = rows[-1][0]
+                rows_copied += len(rows)
+                with self.engine.begin() as conn:
+                    self._load_chunk(conn, table, columns, [row[1:] for row in rows])
+                    conn.execute(migration_checkpoints.update().where(
+                        migration_checkpoints.c.table_name == table.name
+                    ).values(last_rowid=last_rowid, rows_copied=rows_copied))
+                logger.info(f"{table.name}: {rows_copied} rows copied")
+        finally:
+            source.close()
+
+        with self.engine.begin() as conn:
+            conn.execute(migration_checkpoints.update().where(
+                migration_checkpoints.c.table_name == table.name
+            ).values(completed=True))
+
+        logger.info(f"Migrated {rows_copied} rows to {table.name}")
+        return rows_copied
+
+    def fix_sequences(self, tables: List[Table]) -> None:
+        """Move serial sequences past the largest copied id"""
+        if self.engine.dialect.name != "postgresql":
+            return
+        with self.engine.begin() as conn:
+            for table in tables:
+                if "id" in table.c and isinstance(table.c.id.type, Integer):
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                        f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table.name}"
+                    ))
+
+    def rebuild_derived(self) -> None:
+        """Recompute tables derived from others, which schema migrations only backfill once"""
+        from app.services.tag_usage import rebuild_tag_usage
+        with self.engine.begin() as conn:
+            rebuild_tag_usage(conn)
+
+    def _load_chunk(self, conn: Connection, table: Table, columns: List[Column], rows: list) -> None:
+        if self.use_copy:
+            buffer = io.StringIO()
+            for row in rows:
+                buffer.write("\t".join(copy_text_value(v, c) for v, c in zip(row, columns)))
+                buffer.write("\n")
+            buffer.seek(0)
+            column_list = ", ".join(f'"{c.name}"' for c in columns)
+            dbapi_cursor = conn.connection.cursor()
+            try:
+                dbapi_cursor.copy_expert(f"COPY {table.name} ({column_list}) FROM STDIN", buffer)
+            finally:
+                dbapi_cursor.close()
+        else:
+            conn.execute(storage_table(table, columns).insert(), [
+                {c.name: bind_value(v, c) for v, c in zip(row, columns)} for row in rows
+            ])
+
+    def _clear_target(self, conn: Connection, table: Table) -> None:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"TRUNCATE TABLE {table.name} RESTART IDENTITY CASCADE"))
+        else:
+            conn.execute(table.delete())
+
+    def _checkpoint(self, table_name: str):
+        with self.engine.connect() as conn:
+            return conn.execute(migration_checkpoints.select().where(
+                migration_checkpoints.c.table_name == table_name
+            )).first()
+
+    def _source_tables(self) -> set:
+        source = sqlite3.connect(self.sqlite_path)
+        try:
+            return {row[0] for row in source.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        finally:
+            source.close()
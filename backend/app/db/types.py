@@ -0,0 +1,16 @@
+"""
+Shared column types
+"""
+from sqlalchemy import DateTime
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+
+# SQLite stores server_default=func.now() as 'YYYY-MM-DD HH:MM:SS' text, while
+# the default SQLite DateTime binds parameters with microseconds appended. The
+# two strings never compare equal, which breaks keyset pagination on
+# (created_at, id). Binding at the same second precision keeps comparisons exact.
+Timestamp = DateTime(timezone=True).with_variant(
+    SQLITE_DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite"
+)
@@ -6,13 +6,22 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
-from app.db.session import engine, Base
+from app.db.session import engine, async_engine, Base
+from app.db.migrations import apply_migrations
+from app.db.sqlite import is_sqlite, sqlite_maintenance_task
+from app.db.compression import content_recompression_task
+from app.db.health import health_checker, get_database_health
 from app.api.routes import auth, content as content_routes, tags, categories, content_sources
 from app.api.routes import analytics, preferences, sharing, export_import, intelligence
 from app.websocket.routes import router as websocket_router
-from app.websocket.manager import heartbeat_task
+from app.websocket.manager import heartbeat_task, backplane
+from app.websocket.events import event_bus
 from app.services.background_import import background_service
 from app.monitoring.middleware import MonitoringMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.db.replicas import replica_router
+from app.core.password_hashing import password_hasher
+from app.api.thread_pools import pool_stats, shutdown_pools
 
 # Import all models to ensure they're registered
 from app.models import user, content as content_model, tag, category, content_source, user_preferences
@@ -22,9 +31,22 @@ limiter = Limiter(key_func=get_remote_address)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Production applies migrations as a deploy step (python -m app.db.migrate upgrade)
+    if settings.ENVIRONMENT != "production":
+        apply_migrations(engine)
+
     # Start background services
+    await backplane.start()
+    event_bus.start()
     import_task = asyncio.create_task(background_service.start_scheduler())
     heartbeat_task_instance = asyncio.create_task(heartbeat_task())
+    health_task = asyncio.create_task(health_checker.run())
+    maintenance_task = None
+    if is_sqlite(settings.DATABASE_URL):
+        maintenance_task = asyncio.create_task(sqlite_maintenance_task(engine))
+    recompression_task = None
+    if settings.CONTENT_COMPRESSION:
+        recompression_task = asyncio.create_task(content_recompression_task(engine))
     
     yield
     
@@ -32,6 +54,17 @@ async def lifespan(app: FastAPI):
     background_service.stop_scheduler()
     import_task.cancel()
     heartbeat_task_instance.cancel()
+    health_task.cancel()
+    if maintenance_task:
+        maintenance_task.cancel()
+    if recompression_task:
+        recompression_task.cancel()
+    event_bus.stop()
+    await backplane.stop()
+    password_hasher.shutdown()
+    shutdown_pools()
+    await async_engine.dispose()
+    await replica_router.dispose()
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -46,11 +79,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add monitoring middleware
 app.add_middleware(MonitoringMiddleware)
 
+# Keep recent writers on the primary when read replicas are configured
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(content_routes.router, prefix="/api/v1/content", tags=["content"])
@@ -74,9 +111,7 @@ def health():
 
 @app.get("/health/detailed")
 def detailed_health():
-    """Detailed health check including database status"""
-    from app.db.health import get_database_health
-    
+    """Detailed health check including database status (cached snapshot)"""
     try:
         db_health = get_database_health()
         return {
@@ -103,6 +138,8 @@ async def performance_metrics():
     return {
         "cpu_percent": psutil.cpu_percent(),
         "memory_percent": psutil.virtual_memory().percent,
+        "password_hashing": password_hasher.stats(),
+        "thread_pools": pool_stats(),
         "timestamp": time.time(),
         "status": "healthy"
     }
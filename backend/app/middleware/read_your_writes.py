@@ -0,0 +1,21 @@
+from typing import Callable
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.db import replicas
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """Pin clients to the primary database for a short window after a write"""
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+
+        if (
+            replicas.replica_router.enabled
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            replicas.replica_router.mark_write(replicas.client_key(request))
+
+        return response
@@ -1,21 +1,31 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, query_expression
 from app.db.session import Base
+from app.db.types import Timestamp
+from app.db.compression import CompressedText
 from app.models.tag import content_tags
 
 class Content(Base):
     __tablename__ = "contents"
+    # Kept in sync with app/db/migrations/versions/v0001_composite_indexes.py
+    __table_args__ = (
+        Index("ix_contents_user_id_created_at", "user_id", "created_at"),
+        Index("ix_contents_user_id_category_id", "user_id", "category_id"),
+        Index("ix_contents_user_id_content_type", "user_id", "content_type"),
+        Index("ix_contents_is_public_created_at", "is_public", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     source_id = Column(Integer, ForeignKey("content_sources.id", ondelete="SET NULL"), nullable=True)
     title = Column(String(200), nullable=False)
     url = Column(String(500), nullable=True)
-    content_text = Column(Text, nullable=True)
+    # Article bodies can be megabytes; load only when a response needs them
+    content_text = deferred(Column(CompressedText, nullable=True))
     content_type = Column(String(50), nullable=False)  # article, video, note, link
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Sharing fields
@@ -27,6 +37,9 @@ class Content(Base):
     reading_time = Column(Integer, nullable=True)  # minutes
     quality_score = Column(Integer, nullable=True)  # 0-100
 
+    # Server-side excerpt of content_text, populated with with_expression()
+    excerpt = query_expression()
+
     # Relationships with string references to avoid circular imports
     user = relationship("User", back_populates="contents")
     source = relationship("ContentSource", back_populates="contents")
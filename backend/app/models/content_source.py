@@ -27,7 +27,7 @@ class ImportLog(Base):
     __tablename__ = "import_logs"
 
     id = Column(Integer, primary_key=True, index=True)
-    source_id = Column(Integer, ForeignKey("content_sources.id", ondelete="CASCADE"), nullable=False)
+    source_id = Column(Integer, ForeignKey("content_sources.id", ondelete="CASCADE"), nullable=False, index=True)
     status = Column(String(50), nullable=False)  # success, error, partial
     items_imported = Column(Integer, default=0)
     items_skipped = Column(Integer, default=0)
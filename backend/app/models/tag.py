@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Table, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -8,7 +8,9 @@ content_tags = Table(
     'content_tags',
     Base.metadata,
     Column('content_id', Integer, ForeignKey('contents.id', ondelete='CASCADE'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    # Reverse lookup (tag -> contents); the primary key only covers content_id first
+    Index('ix_content_tags_tag_id_content_id', 'tag_id', 'content_id')
 )
 
 class Tag(Base):
@@ -20,3 +22,17 @@ class Tag(Base):
     
     # Relationship to contents
     contents = relationship("Content", secondary=content_tags, back_populates="tags")
+
+class UserTagUsage(Base):
+    """Per-user tag counts, kept in step with content_tags by app.services.tag_usage"""
+    __tablename__ = "user_tag_usage"
+    # Top-N tags for a user is a range scan over (user_id, count)
+    __table_args__ = (
+        Index("ix_user_tag_usage_user_id_count", "user_id", "count"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    tag = relationship("Tag")
@@ -120,6 +120,17 @@ class HealthMetrics:
         metrics.increment_counter('DatabaseOperation', dimensions)
         metrics.record_latency('DatabaseLatency', duration * 1000, dimensions)
     
+    @staticmethod
+    def record_request_queries(endpoint: str, query_count: int, db_time_ms: float, n_plus_one: bool):
+        """Record per-request SQL statement metrics"""
+        dimensions = {'Endpoint': endpoint}
+        
+        metrics.put_metric('DBQueriesPerRequest', query_count, 'Count', dimensions)
+        metrics.record_latency('DBTimePerRequest', db_time_ms, dimensions)
+        
+        if n_plus_one:
+            metrics.increment_counter('NPlusOneDetected', dimensions)
+    
     @staticmethod
     def record_user_activity(activity: str, user_id: str = None):
         """Record user activity metrics"""
@@ -6,7 +6,9 @@ import logging
 from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
+from app.core.config import settings
 from app.monitoring.metrics import HealthMetrics
+from app.monitoring.sql import start_request_stats, end_request_stats
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,7 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         start_time = time.time()
+        stats, stats_token = start_request_stats()
         
         # Extract request info
         method = request.method
@@ -35,8 +38,13 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
                 response_time=process_time
             )
             
+            self._record_queries(path, method, stats)
+            
             # Add response headers
             response.headers["X-Process-Time"] = str(process_time)
+            if settings.ENVIRONMENT != "production":
+                response.headers["X-DB-Queries"] = str(stats.count)
+                response.headers["X-DB-Time"] = f"{stats.total_ms:.2f}"
             
             # Log request
             logger.info(
@@ -57,3 +65,21 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
             
             logger.error(f"{method} {path} - ERROR: {str(e)} - {process_time:.3f}s")
             raise
+        
+        finally:
+            end_request_stats(stats_token)
+    
+    def _record_queries(self, path: str, method: str, stats) -> None:
+        """Report SQL counts for the request and flag repeated statement shapes"""
+        repeated = stats.n_plus_one()
+        HealthMetrics.record_request_queries(path, stats.count, stats.total_ms, bool(repeated))
+        
+        for shape, count in repeated:
+            logger.warning(f"Possible N+1 on {method} {path}: {count}x {shape}")
+        
+        if stats.slowest:
+            slowest_ms, slowest_statement = stats.slowest[0]
+            logger.debug(
+                f"{method} {path} - {stats.count} queries, {stats.total_ms:.1f}ms in DB, "
+                f"slowest {slowest_ms:.1f}ms: {slowest_statement}"
+            )
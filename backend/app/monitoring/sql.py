@@ -0,0 +1,105 @@
+"""
+Per-request SQL instrumentation
+
+Engine events feed a QueryStats object held in a contextvar for the duration
+of each request: statement count, total database time and the slowest
+statements. Statements over SLOW_QUERY_MS are logged with their parameters
+redacted, and a statement shape repeated N_PLUS_ONE_THRESHOLD times in one
+request is reported as a likely N+1 query.
+"""
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How many of the slowest statements each request keeps
+SLOWEST_KEPT = 3
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,?)+\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeats with different IN-list sizes or literals match"""
+    shape = _IN_LIST.sub("(?)", statement)
+    shape = _NUMBER.sub("N", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+def redact_parameters(parameters) -> str:
+    """Describe bound parameters by type only, never by value"""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"<{len(parameters)} parameter sets>"
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return "<redacted>"
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.shapes[statement_shape(statement)] += 1
+            self.slowest.append((elapsed_ms, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def n_plus_one(self) -> List[Tuple[str, int]]:
+        """Statement shapes repeated often enough to look like an N+1 pattern"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= settings.N_PLUS_ONE_THRESHOLD]
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def start_request_stats() -> Tuple[QueryStats, object]:
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+def end_request_stats(token) -> None:
+    _current_stats.reset(token)
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            f"Slow query ({elapsed_ms:.1f}ms): {_WHITESPACE.sub(' ', statement)} "
+            f"params={redact_parameters(parameters)}"
+        )
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach the statement hooks; pass engine.sync_engine for async engines"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -14,6 +14,11 @@ class TagResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TagUsageResponse(BaseModel):
+    id: int
+    name: str
+    count: int
+
 # Category Schemas
 class CategoryCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -50,6 +55,28 @@ class ContentUpdate(BaseModel):
     category_id: Optional[int] = None
     tag_ids: Optional[List[int]] = None
 
+class ContentSummaryResponse(BaseModel):
+    """Sparse view of a content item; only the requested fields are populated"""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    title: Optional[str] = None
+    url: Optional[str] = None
+    content_text: Optional[str] = None
+    excerpt: Optional[str] = None
+    content_type: Optional[str] = None
+    category_id: Optional[int] = None
+    category: Optional[CategoryResponse] = None
+    tags: Optional[List[TagResponse]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+# Fields a list request may select, and the default set for summary views
+SPARSE_CONTENT_FIELDS = set(ContentSummaryResponse.model_fields)
+SUMMARY_CONTENT_FIELDS = SPARSE_CONTENT_FIELDS - {"content_text", "excerpt"}
+
 class ContentResponse(BaseModel):
     id: int
     user_id: int
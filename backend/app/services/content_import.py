@@ -7,11 +7,15 @@ from sqlalchemy.orm import Session
 from app.models.content_source import ContentSource, ImportLog
 from app.models.content import Content
 from app.models.user import User
+from app.websocket.events import publish_batch_event
+from app.websocket.manager import WSEventType
 
 class ContentImportService:
     def __init__(self, db: Session):
         self.db = db
         self.timeout = aiohttp.ClientTimeout(total=30)
+        # Content added by the current import, announced once it is committed
+        self.new_items: List[Content] = []
     
     async def import_from_source(self, source_id: int) -> Dict:
         """Import content from a single source"""
@@ -19,6 +23,8 @@ class ContentImportService:
         if not source or not source.active:
             return {"status": "error", "message": "Source not found or inactive"}
         
+        self.new_items = []
+
         # Create import log
         import_log = ImportLog(
             source_id=source_id,
@@ -52,7 +58,12 @@ class ContentImportService:
             import_log.error_message = result.get("message") if result["status"] == "error" else None
             import_log.completed_at = datetime.now(timezone.utc)
             
+            # Flush for ids: reading them after the commit would reload every row
+            self.db.flush()
+            created_ids = [c.id for c in self.new_items]
+            user_id = source.user_id
             self.db.commit()
+            publish_batch_event(WSEventType.CONTENT_BATCH_CREATED, created_ids, user_id, source_id=source_id)
             return result
             
         except Exception as e:
@@ -96,6 +107,7 @@ class ContentImportService:
                         )
                         
                         self.db.add(content_item)
+                        self.new_items.append(content_item)
                         items_imported += 1
                     
                     return {
@@ -134,6 +146,7 @@ class ContentImportService:
                     )
                     
                     self.db.add(content_item)
+                    self.new_items.append(content_item)
                     return {"status": "success", "items_imported": 1, "items_skipped": 0}
                     
             except asyncio.TimeoutError:
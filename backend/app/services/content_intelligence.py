@@ -2,9 +2,9 @@ import re
 from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from collections import Counter
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, undefer
 from app.models.content import Content
-from app.models.tag import Tag
+from app.models.tag import Tag, UserTagUsage
 
 class ContentIntelligenceService:
     """Service for content analysis, auto-tagging, and recommendations"""
@@ -170,7 +170,10 @@ class ContentIntelligenceService:
 
     def batch_analyze(self, user_id: int, limit: int = 100) -> Dict:
         """Analyze multiple content items for a user"""
-        contents = self.db.query(Content).filter(
+        # Scoring reads tags and the body; load both for the whole batch up front
+        contents = self.db.query(Content).options(
+            selectinload(Content.tags), undefer(Content.content_text)
+        ).filter(
             Content.user_id == user_id
         ).limit(limit).all()
 
@@ -218,13 +221,13 @@ class ContentIntelligenceService:
                 if query_lower in word and len(word) > 2:
                     suggestions.add(word)
 
-        # Search in tag names
+        # Search in the names of tags this user has applied
         tags = self.db.query(Tag).join(
-            Content.tags
+            UserTagUsage, UserTagUsage.tag_id == Tag.id
         ).filter(
-            Content.user_id == user_id,
+            UserTagUsage.user_id == user_id,
             Tag.name.ilike(f'%{query}%')
-        ).distinct().limit(limit).all()
+        ).order_by(UserTagUsage.count.desc()).limit(limit).all()
 
         for tag in tags:
             if query_lower in tag.name.lower():
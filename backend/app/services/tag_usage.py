@@ -0,0 +1,71 @@
+"""
+Per-user tag usage counts
+
+user_tag_usage mirrors content_tags grouped by content owner, so top-tag and
+counted tag-list queries read a few index entries instead of joining tags,
+content_tags and contents. Every path that adds or removes a user's
+content_tags rows records the change here in the same transaction.
+"""
+from typing import Dict, Iterable
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.content import Content
+from app.models.tag import UserTagUsage, content_tags
+
+def tag_changes(old_ids: Iterable[int], new_ids: Iterable[int]) -> Dict[int, int]:
+    """Deltas for replacing one item's tag set with another"""
+    old_ids, new_ids = set(old_ids), set(new_ids)
+    changes = {tag_id: 1 for tag_id in new_ids - old_ids}
+    changes.update({tag_id: -1 for tag_id in old_ids - new_ids})
+    return changes
+
+def record_tag_usage(db: Session, user_id: int, changes: Dict[int, int]) -> None:
+    """Apply per-tag count deltas for one user"""
+    added = [
+        {"user_id": user_id, "tag_id": tag_id, "count": delta}
+        for tag_id, delta in changes.items() if delta > 0
+    ]
+    removed = {tag_id: delta for tag_id, delta in changes.items() if delta < 0}
+
+    if added:
+        upsert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        stmt = upsert(UserTagUsage).values(added)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserTagUsage.user_id, UserTagUsage.tag_id],
+            set_={"count": UserTagUsage.count + stmt.excluded.count},
+        ))
+
+    if removed:
+        for tag_id, delta in removed.items():
+            db.execute(
+                update(UserTagUsage)
+                .where(UserTagUsage.user_id == user_id, UserTagUsage.tag_id == tag_id)
+                .values(count=UserTagUsage.count + delta)
+            )
+        db.execute(delete(UserTagUsage).where(
+            UserTagUsage.user_id == user_id,
+            UserTagUsage.tag_id.in_(removed),
+            UserTagUsage.count <= 0,
+        ))
+
+def usage_for_contents(db: Session, content_ids: Iterable[int]) -> Dict[int, int]:
+    """Negative deltas that removing the given content items would cause"""
+    rows = db.execute(
+        select(content_tags.c.tag_id, func.count())
+        .where(content_tags.c.content_id.in_(list(content_ids)))
+        .group_by(content_tags.c.tag_id)
+    ).all()
+    return {tag_id: -count for tag_id, count in rows}
+
+def rebuild_tag_usage(conn: Connection) -> None:
+    """Recompute every count from content_tags"""
+    conn.execute(delete(UserTagUsage))
+    conn.execute(insert(UserTagUsage).from_select(
+        ["user_id", "tag_id", "count"],
+        select(Content.user_id, content_tags.c.tag_id, func.count())
+        .select_from(content_tags.join(Content, Content.id == content_tags.c.content_id))
+        .group_by(Content.user_id, content_tags.c.tag_id)
+    ))
@@ -0,0 +1,202 @@
+"""
+Event backplane for real-time delivery across processes
+
+Sockets are held by whichever worker accepted them, so an event raised in
+one process has to reach the others. ``broadcast_*`` helpers publish to the
+backplane instead of the local manager:
+
+- LocalBackplane hands events straight to this process's sockets. This is
+  the default, and all a single worker needs.
+- PostgresBackplane also shares events through LISTEN/NOTIFY on the
+  application database. Local sockets are still served immediately (the
+  fast path). Events for other processes are batched for WS_BACKPLANE_BATCH_MS
+  and sent as a few NOTIFY payloads, and each process ignores its own echo.
+  A lost LISTEN connection is noticed and re-established by the listener
+  loop within WS_BACKPLANE_RECONNECT_S; events NOTIFYed while it was down
+  are not replayed.
+
+An event is ``{"message": {...}, "user_id": int | None}``, or
+``{"message": {...}, "room": str, "exclude": str | None}`` for room delivery;
+with neither a room nor a user_id it goes to every connection.
+"""
+import abc
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[dict], Awaitable[None]]
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+
+def to_asyncpg_dsn(url: str) -> str:
+    """asyncpg wants a plain postgresql:// DSN without a SQLAlchemy driver suffix"""
+    scheme, sep, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}{sep}{rest}"
+
+class Backplane(abc.ABC):
+    def __init__(self, handler: EventHandler):
+        self.handler = handler
+
+    async def start(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def publish(self, event: dict) -> None:
+        """Deliver an event to every process's sockets"""
+
+    async def stop(self) -> None:
+        pass
+
+class LocalBackplane(Backplane):
+    """Single-process delivery"""
+
+    async def publish(self, event: dict) -> None:
+        await self.handler(event)
+
+class PostgresBackplane(Backplane):
+    """Shares events between processes through PostgreSQL LISTEN/NOTIFY"""
+
+    def __init__(
+        self,
+        handler: EventHandler,
+        dsn: str,
+        channel: str = None,
+        batch_ms: float = None,
+        connect: Callable = None,
+        reconnect_s: float = None,
+    ):
+        super().__init__(handler)
+        self.dsn = dsn
+        self.channel = channel or settings.WS_BACKPLANE_CHANNEL
+        self.batch_interval = (settings.WS_BACKPLANE_BATCH_MS if batch_ms is None else batch_ms) / 1000
+        self.reconnect_interval = settings.WS_BACKPLANE_RECONNECT_S if reconnect_s is None else reconnect_s
+        self.instance_id = uuid.uuid4().hex
+        self._connect = connect
+        self._listen_conn = None
+        self._publish_conn = None
+        self._pending: List[dict] = []
+        self._has_pending: Optional[asyncio.Event] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self.published_batches = 0
+        self.received_events = 0
+        self.reconnects = 0
+
+    async def start(self) -> None:
+        self._has_pending = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flusher())
+        try:
+            await self._ensure_listening()
+        except Exception as e:
+            logger.error(f"Backplane could not connect, serving local sockets only until it can: {e}")
+        self._listen_task = asyncio.create_task(self._listener())
+
+    async def _open(self):
+        if self._connect is None:
+            import asyncpg
+            self._connect = asyncpg.connect
+        return await self._connect(self.dsn)
+
+    async def _ensure_listening(self) -> None:
+        if self._listen_conn is None or self._listen_conn.is_closed():
+            self._listen_conn = await self._open()
+            await self._listen_conn.add_listener(self.channel, self._on_notify)
+
+    async def _ensure_publishing(self) -> None:
+        if self._publish_conn is None or self._publish_conn.is_closed():
+            self._publish_conn = await self._open()
+
+    async def _listener(self) -> None:
+        """Re-establish LISTEN when its connection drops, even if nothing is published"""
+        while True:
+            await asyncio.sleep(self.reconnect_interval)
+            if self._listen_conn is not None and not self._listen_conn.is_closed():
+                continue
+            try:
+                await self._ensure_listening()
+                self.reconnects += 1
+                logger.info("Backplane LISTEN connection re-established")
+            except Exception as e:
+                logger.warning(f"Backplane reconnect failed, retrying in {self.reconnect_interval}s: {e}")
+
+    async def publish(self, event: dict) -> None:
+        # Local sockets get the event now; other processes with the next batch
+        await self.handler(event)
+        self._pending.append(event)
+        if self._has_pending is not None:
+            self._has_pending.set()
+
+    async def _flusher(self) -> None:
+        while True:
+            await self._has_pending.wait()
+            await asyncio.sleep(self.batch_interval)
+            batch, self._pending = self._pending, []
+            self._has_pending.clear()
+            try:
+                await self._ensure_publishing()
+                for payload in self._payloads(batch):
+                    await self._publish_conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                    self.published_batches += 1
+            except Exception as e:
+                logger.warning(f"Backplane publish failed, {len(batch)} events not shared: {e}")
+
+    def _payloads(self, batch: List[dict]):
+        """Split a batch into NOTIFY payloads under the size limit"""
+        chunk: List[str] = []
+        size = 0
+        for event in batch:
+            encoded = json.dumps(event, separators=(",", ":"))
+            if len(encoded) > MAX_NOTIFY_BYTES:
+                logger.warning(f"Backplane event too large to share ({len(encoded)} bytes)")
+                continue
+            if chunk and size + len(encoded) > MAX_NOTIFY_BYTES:
+                yield self._envelope(chunk)
+                chunk, size = [], 0
+            chunk.append(encoded)
+            size += len(encoded) + 1
+        if chunk:
+            yield self._envelope(chunk)
+
+    def _envelope(self, encoded_events: List[str]) -> str:
+        return f'{{"origin":"{self.instance_id}","events":[{",".join(encoded_events)}]}}'
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        try:
+            envelope = json.loads(payload)
+        except ValueError as e:
+            logger.warning(f"Ignoring malformed backplane payload: {e}")
+            return
+        if envelope.get("origin") == self.instance_id:
+            return
+        events = envelope.get("events", [])
+        self.received_events += len(events)
+        asyncio.get_running_loop().create_task(self._dispatch(events))
+
+    async def _dispatch(self, events: List[dict]) -> None:
+        for event in events:
+            try:
+                await self.handler(event)
+            except Exception as e:
+                logger.warning(f"Backplane event dispatch failed: {e}")
+
+    async def stop(self) -> None:
+        for task in (self._flush_task, self._listen_task):
+            if task:
+                task.cancel()
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = self._publish_conn = None
+
+def create_backplane(handler: EventHandler) -> Backplane:
+    if settings.WS_BACKPLANE == "postgres":
+        return PostgresBackplane(handler, to_asyncpg_dsn(settings.DATABASE_URL))
+    if settings.WS_BACKPLANE != "local":
+        raise ValueError(f"Unknown WS_BACKPLANE: {settings.WS_BACKPLANE}")
+    return LocalBackplane(handler)
@@ -0,0 +1,224 @@
+"""
+WebSocket message encodings
+
+Messages are JSON text unless the client asks for a binary encoding with a
+WebSocket subprotocol when it connects:
+
+- ``json`` (or no subprotocol): JSON text frames.
+- ``msgpack``: binary frames holding MessagePack.
+- ``msgpack.deflate``: the same, with payloads of WS_DEFLATE_THRESHOLD bytes
+  or more compressed with raw deflate. Meant for clients whose WebSocket
+  stack can't negotiate permessage-deflate, which uvicorn already offers.
+
+Binary frames start with one flag byte (FRAME_RAW or FRAME_DEFLATE) followed
+by the MessagePack body, so a client decodes every frame the same way. Only
+the MessagePack types JSON can express are used, with a pure-Python codec.
+
+Inbound deflate frames are inflated to at most WS_MAX_INBOUND_BYTES, and any
+frame that can't be decoded raises MessageError, which the endpoint answers
+with an error message instead of dropping the connection.
+"""
+import json
+import struct
+import zlib
+from typing import Iterable, Optional, Tuple, Union
+from app.core.config import settings
+
+ENCODINGS = ("json", "msgpack", "msgpack.deflate")
+
+FRAME_RAW = 0x00
+FRAME_DEFLATE = 0x01
+
+Payload = Union[str, bytes]
+
+class MessageError(ValueError):
+    """An inbound frame that isn't a well-formed message"""
+
+def negotiate_subprotocol(offered: Iterable[str]) -> Optional[str]:
+    """First subprotocol the client offered that we speak, if any"""
+    for subprotocol in offered:
+        if subprotocol in ENCODINGS:
+            return subprotocol
+    return None
+
+def encode_message(message: dict, encoding: str = "json") -> Payload:
+    if encoding == "json":
+        return json.dumps(message)
+    body = packb(message)
+    if encoding == "msgpack.deflate" and len(body) >= settings.WS_DEFLATE_THRESHOLD:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+        return bytes([FRAME_DEFLATE]) + compressor.compress(body) + compressor.flush()
+    return bytes([FRAME_RAW]) + body
+
+def decode_message(data: Payload) -> dict:
+    """Decode an inbound frame; text is JSON, bytes a flagged MessagePack frame"""
+    try:
+        message = json.loads(data) if isinstance(data, str) else _decode_binary(data)
+    except RecursionError:
+        raise MessageError("Message nested too deeply") from None
+    except (ValueError, zlib.error) as e:
+        raise MessageError(str(e)) from e
+    if not isinstance(message, dict):
+        raise MessageError("Message must be an object")
+    return message
+
+def _decode_binary(data: bytes):
+    if not data:
+        raise ValueError("Empty binary frame")
+    flag, body = data[0], data[1:]
+    if flag == FRAME_DEFLATE:
+        # Bounded inflate: a small frame must not expand into an unbounded buffer
+        inflater = zlib.decompressobj(-15)
+        body = inflater.decompress(body, settings.WS_MAX_INBOUND_BYTES)
+        if inflater.unconsumed_tail:
+            raise ValueError(f"Inflated frame exceeds {settings.WS_MAX_INBOUND_BYTES} bytes")
+    elif flag != FRAME_RAW:
+        raise ValueError(f"Unknown frame flag: {flag}")
+    return unpackb(body)
+
+# MessagePack
+
+def packb(obj) -> bytes:
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+def _pack(obj, out: bytearray) -> None:
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        _pack_int(obj, out)
+    elif isinstance(obj, float):
+        out.append(0xcb)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        _pack_header(len(data), out, 0xa0, 32, 0xd9, 0xda, 0xdb)
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        _pack_header(len(obj), out, None, 0, 0xc4, 0xc5, 0xc6)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _pack_header(len(obj), out, 0x90, 16, None, 0xdc, 0xdd)
+        for item in obj:
+            _pack(item, out)
+    elif isinstance(obj, dict):
+        _pack_header(len(obj), out, 0x80, 16, None, 0xde, 0xdf)
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    else:
+        raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif value >= 0:
+        for code, fmt, limit in ((0xcc, ">B", 1 << 8), (0xcd, ">H", 1 << 16), (0xce, ">I", 1 << 32), (0xcf, ">Q", 1 << 64)):
+            if value < limit:
+                out.append(code)
+                out += struct.pack(fmt, value)
+                return
+        raise OverflowError("Integer too large for MessagePack")
+    else:
+        for code, fmt, limit in ((0xd0, ">b", 1 << 7), (0xd1, ">h", 1 << 15), (0xd2, ">i", 1 << 31), (0xd3, ">q", 1 << 63)):
+            if value >= -limit:
+                out.append(code)
+                out += struct.pack(fmt, value)
+                return
+        raise OverflowError("Integer too small for MessagePack")
+
+def _pack_header(length: int, out: bytearray, fix: Optional[int], fix_limit: int, code8, code16, code32) -> None:
+    if fix is not None and length < fix_limit:
+        out.append(fix | length)
+    elif code8 is not None and length < 1 << 8:
+        out.append(code8)
+        out.append(length)
+    elif length < 1 << 16:
+        out.append(code16)
+        out += struct.pack(">H", length)
+    else:
+        out.append(code32)
+        out += struct.pack(">I", length)
+
+def unpackb(data: bytes):
+    obj, offset = _unpack(data, 0)
+    if offset != len(data):
+        raise ValueError("Extra data after MessagePack object")
+    return obj
+
+_FIXED = {
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+    0xca: ">f", 0xcb: ">d",
+}
+# code -> (length format, kind)
+_SIZED = {
+    0xd9: (">B", "str"), 0xda: (">H", "str"), 0xdb: (">I", "str"),
+    0xc4: (">B", "bin"), 0xc5: (">H", "bin"), 0xc6: (">I", "bin"),
+    0xdc: (">H", "array"), 0xdd: (">I", "array"),
+    0xde: (">H", "map"), 0xdf: (">I", "map"),
+}
+
+def _unpack(data: bytes, offset: int) -> Tuple[object, int]:
+    try:
+        code = data[offset]
+    except IndexError:
+        raise ValueError("Truncated MessagePack data") from None
+    offset += 1
+    if code < 0x80:
+        return code, offset
+    if code >= 0xe0:
+        return code - 0x100, offset
+    if code <= 0x8f:
+        return _unpack_container(data, offset, code & 0x0f, "map")
+    if code <= 0x9f:
+        return _unpack_container(data, offset, code & 0x0f, "array")
+    if code <= 0xbf:
+        return _unpack_container(data, offset, code & 0x1f, "str")
+    if code == 0xc0:
+        return None, offset
+    if code == 0xc2:
+        return False, offset
+    if code == 0xc3:
+        return True, offset
+    if code in _FIXED:
+        fmt = _FIXED[code]
+        end = offset + struct.calcsize(fmt)
+        if end > len(data):
+            raise ValueError("Truncated MessagePack data")
+        return struct.unpack(fmt, data[offset:end])[0], end
+    if code in _SIZED:
+        fmt, kind = _SIZED[code]
+        end = offset + struct.calcsize(fmt)
+        if end > len(data):
+            raise ValueError("Truncated MessagePack data")
+        return _unpack_container(data, end, struct.unpack(fmt, data[offset:end])[0], kind)
+    raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+
+def _unpack_container(data: bytes, offset: int, length: int, kind: str) -> Tuple[object, int]:
+    if kind in ("str", "bin"):
+        end = offset + length
+        if end > len(data):
+            raise ValueError("Truncated MessagePack data")
+        raw = data[offset:end]
+        return (raw.decode("utf-8") if kind == "str" else bytes(raw)), end
+    if kind == "array":
+        items = []
+        for _ in range(length):
+            item, offset = _unpack(data, offset)
+            items.append(item)
+        return items, offset
+    result = {}
+    for _ in range(length):
+        key, offset = _unpack(data, offset)
+        if isinstance(key, (list, dict)):
+            raise ValueError("MessagePack map key must be a scalar")
+        result[key], offset = _unpack(data, offset)
+    return result, offset
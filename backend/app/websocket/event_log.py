@@ -0,0 +1,58 @@
+"""
+Recent per-user events for resuming a dropped WebSocket
+
+Events addressed to a user (content_created and friends) get a per-user
+sequence number and are kept in a ring buffer of WS_EVENT_LOG_SIZE. A client
+that reconnects with ``resume_from=<last seq>&log_id=<id>`` is sent what it
+missed instead of reloading its lists; if the gap is no longer buffered, or
+the log is a different one (another worker, or a restart), it is told to do
+a full resync.
+
+The log lives in memory, so sequence numbers are only meaningful with the
+``log_id`` that issued them.
+"""
+import uuid
+from collections import OrderedDict, deque
+from typing import List, Optional
+from app.core.config import settings
+
+class EventLog:
+    def __init__(self, size: int = None, max_users: int = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.size = size or settings.WS_EVENT_LOG_SIZE
+        self.max_users = max_users or settings.WS_EVENT_LOG_USERS
+        # user_id -> (last seq, recent events); least recently active users are evicted first
+        self._users: "OrderedDict[int, tuple]" = OrderedDict()
+
+    def append(self, user_id: int, message: dict) -> dict:
+        """Stamp ``message`` with the user's next sequence number and keep it"""
+        last_seq, events = self._users.pop(user_id, (0, None))
+        if events is None:
+            events = deque(maxlen=self.size)
+        stamped = {**message, "seq": last_seq + 1}
+        events.append(stamped)
+        self._users[user_id] = (last_seq + 1, events)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+        return stamped
+
+    def last_seq(self, user_id: int) -> int:
+        return self._users.get(user_id, (0, None))[0]
+
+    def since(self, user_id: int, seq: int) -> Optional[List[dict]]:
+        """Events after ``seq``, or None when some of them are no longer buffered"""
+        last_seq, events = self._users.get(user_id, (0, None))
+        if seq > last_seq:
+            return None
+        if seq == last_seq:
+            return []
+        if not events or events[0]["seq"] > seq + 1:
+            return None
+        return [event for event in events if event["seq"] > seq]
+
+    def stats(self) -> dict:
+        return {
+            "log_id": self.id,
+            "users": len(self._users),
+            "events": sum(len(events) for _, events in self._users.values()),
+        }
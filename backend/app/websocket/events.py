@@ -0,0 +1,117 @@
+"""
+Event bus for raising real-time events from any thread
+
+Sync route handlers run on worker threads with no event loop, so they can't
+schedule a broadcast coroutine themselves. They call ``publish_content_event``
+instead: events are appended to a thread-safe buffer, and the first event of
+a tick wakes the loop with ``call_soon_threadsafe``. The loop then delivers
+everything buffered by that point in one task, and the publishing thread
+never waits on it.
+
+The bus is bound to the application loop in the lifespan. Until then (e.g. a
+TestClient used without its context manager) events are dropped and counted.
+Publish only after the change is committed.
+
+Bulk operations and imports publish ``content_batch_*`` events instead of one
+event per row: up to WS_BATCH_EVENT_SIZE ids each, as an ``ids`` list where
+consecutive runs are written as inclusive ``[first, last]`` pairs.
+"""
+import asyncio
+import logging
+import threading
+from typing import Iterable, List, Optional, Tuple, Union
+from app.core.config import settings
+from app.websocket.manager import broadcast_content_event
+
+logger = logging.getLogger(__name__)
+
+# (event type, data, user id)
+Event = Tuple[str, dict, Optional[int]]
+
+class EventBus:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._pending: List[Event] = []
+        self._scheduled = False
+        self.published = 0
+        self.batches = 0
+        self.dropped = 0
+
+    def start(self, loop: asyncio.AbstractEventLoop = None) -> None:
+        self._loop = loop or asyncio.get_running_loop()
+
+    def stop(self) -> None:
+        self._loop = None
+
+    def publish(self, event_type: str, data: dict, user_id: int = None) -> None:
+        """Queue an event for delivery; safe to call from any thread"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.dropped += 1
+            return
+        with self._lock:
+            self._pending.append((event_type, data, user_id))
+            self.published += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._flush)
+        except RuntimeError:
+            # Loop closed between the check and the call
+            with self._lock:
+                self.dropped += len(self._pending)
+                self._pending = []
+                self._scheduled = False
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+        if batch:
+            self.batches += 1
+            asyncio.get_running_loop().create_task(self._deliver(batch))
+
+    async def _deliver(self, batch: List[Event]) -> None:
+        for event_type, data, user_id in batch:
+            try:
+                await broadcast_content_event(event_type, data, user_id)
+            except Exception as e:
+                logger.warning(f"Delivering {event_type} event failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "published": self.published,
+            "batches": self.batches,
+            "pending": pending,
+            "dropped": self.dropped,
+        }
+
+event_bus = EventBus()
+
+def publish_content_event(event_type: str, data: dict, user_id: int = None) -> None:
+    event_bus.publish(event_type, data, user_id)
+
+def id_ranges(ids: Iterable[int]) -> List[Union[int, List[int]]]:
+    """[1, 2, 3, 7, 9, 10] -> [[1, 3], 7, [9, 10]]"""
+    compact: List[Union[int, List[int]]] = []
+    for content_id in sorted(set(ids)):
+        last = compact[-1] if compact else None
+        if isinstance(last, list) and last[1] == content_id - 1:
+            last[1] = content_id
+        elif isinstance(last, int) and last == content_id - 1:
+            compact[-1] = [last, content_id]
+        else:
+            compact.append(content_id)
+    return compact
+
+def publish_batch_event(event_type: str, ids: List[int], user_id: int = None, **data) -> None:
+    """Publish ``ids`` as one batch event per WS_BATCH_EVENT_SIZE chunk"""
+    size = settings.WS_BATCH_EVENT_SIZE
+    ids = sorted(ids)
+    for start in range(0, len(ids), size):
+        chunk = ids[start:start + size]
+        event_bus.publish(event_type, {"ids": id_ranges(chunk), "count": len(chunk), **data}, user_id)
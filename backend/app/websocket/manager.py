@@ -1,86 +1,332 @@
-from fastapi import WebSocket, WebSocketDisconnect, Depends
-from typing import Dict, List, Set
-import json
+"""
+WebSocket connection manager
+
+Every connection has a bounded outbound queue drained by its own writer task.
+Sending serializes a message once per encoding in use (JSON, or MessagePack
+for clients that negotiated it; see codec.py) and only enqueues the payload, so fan-out
+cost doesn't depend on how fast any one client reads. A client whose queue is
+full is a slow consumer: the message is dropped for it, or it is disconnected,
+per WS_OVERFLOW_POLICY.
+
+Collaboration and presence events go to rooms rather than to everyone:
+"content:<id>" for the people watching an item and "user:<id>" for a user's
+presence. Connections join rooms with subscribe messages, and the room index
+keeps fan-out proportional to the subscribers. Inbound messages are rate
+limited per connection, and typing/cursor updates are coalesced before they
+reach a room (see throttle.py). Events for a user are sequenced in an
+EventLog so a reconnecting client can resume where it left off.
+
+Liveness is per connection: any inbound message counts as activity, and a
+``{"type": "heartbeat"}`` goes only to connections idle for WS_PING_INTERVAL
+(plus a fixed per-connection jitter, so sockets opened together aren't pinged
+together). Clients answer it with ``{"type": "pong"}``. A connection that has
+answered a heartbeat before and then stays silent for WS_PONG_TIMEOUT is
+reaped. Listen-only clients that never answer are kept: dead sockets among
+them are found by the server's protocol-level WebSocket pings (uvicorn's
+--ws-ping-interval), which the application can't see.
+"""
+from fastapi import WebSocket
+from typing import Dict, Iterable, List, Optional, Set
 import asyncio
+import logging
+import random
+import time
+import uuid
 from datetime import datetime
-from app.core.security import get_current_user_websocket
-from app.models.user import User
+from app.core.config import settings
+from app.monitoring.metrics import metrics
+from app.websocket.backplane import create_backplane
+from app.websocket.codec import Payload, encode_message
+from app.websocket.event_log import EventLog
+from app.websocket.throttle import Coalescer, Send, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Close code for connections dropped for falling behind ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close code for connections that stopped answering heartbeats ("going away")
+STALE_CLOSE_CODE = 1001
+
+class Connection:
+    """One socket, its outbound queue and the task that drains it"""
+
+    def __init__(self, websocket: WebSocket, user_id: int, queue_size: int, encoding: str = "json"):
+        self.id = uuid.uuid4().hex
+        self.websocket = websocket
+        self.encoding = encoding
+        self.user_id = user_id
+        self.rooms: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.connected_at = datetime.utcnow()
+        self.last_activity = time.monotonic()
+        self.pinged_at: Optional[float] = None
+        # Set once the client replies to a heartbeat; only such clients are reaped
+        self.answers_heartbeats = False
+        # Spreads pings for sockets that connected at the same moment
+        self.ping_jitter = random.uniform(0, settings.WS_PING_INTERVAL / 4)
+        self.dropped = 0
+        self.inbound = TokenBucket(settings.WS_INBOUND_RATE, settings.WS_INBOUND_BURST)
+        self.coalescer = Coalescer(settings.WS_COALESCE_WINDOW_MS)
+        self.writer: Optional[asyncio.Task] = None
+
+    def touch(self) -> None:
+        self.last_activity = time.monotonic()
+        self.pinged_at = None
+
+    def start(self, on_failure) -> None:
+        self.writer = asyncio.create_task(self._drain(on_failure))
+
+    async def _drain(self, on_failure) -> None:
+        try:
+            while True:
+                payload = await self.queue.get()
+                if isinstance(payload, bytes):
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"WebSocket send to user {self.user_id} failed: {e}")
+            on_failure(self.websocket)
+
+    def stop(self) -> None:
+        self.coalescer.cancel()
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, queue_size: int = None, overflow_policy: str = None):
         # Store active connections by user_id
         self.active_connections: Dict[int, Set[WebSocket]] = {}
-        # Store connection metadata
-        self.connection_metadata: Dict[WebSocket, Dict] = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: int):
-        await websocket.accept()
-        
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = set()
-        
-        self.active_connections[user_id].add(websocket)
-        self.connection_metadata[websocket] = {
-            "user_id": user_id,
-            "connected_at": datetime.utcnow(),
-            "last_ping": datetime.utcnow()
-        }
-        
+        # Per-socket state: outbound queue, writer task, metadata
+        self.connections: Dict[WebSocket, Connection] = {}
+        # Room name -> subscribed sockets
+        self.rooms: Dict[str, Set[WebSocket]] = {}
+        self.queue_size = queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.overflow_policy = overflow_policy or settings.WS_OVERFLOW_POLICY
+        self.dropped_messages = 0
+        self.slow_consumer_disconnects = 0
+        self.throttled_messages = 0
+        self.coalesced_messages = 0
+        self.resumes = 0
+        self.resyncs = 0
+        self.pings_sent = 0
+        self.stale_disconnects = 0
+        self.event_log = EventLog()
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        resume_from: int = None,
+        log_id: str = None,
+        subprotocol: str = None
+    ):
+        await websocket.accept(subprotocol=subprotocol)
+
+        connection = Connection(websocket, user_id, self.queue_size, subprotocol or "json")
+        self.active_connections.setdefault(user_id, set()).add(websocket)
+        self.connections[websocket] = connection
+        connection.start(self.disconnect)
+
         # Send welcome message
         await self.send_personal_message({
             "type": "connection_established",
             "message": "Connected to real-time updates",
+            "log_id": self.event_log.id,
+            "seq": self.event_log.last_seq(user_id),
             "timestamp": datetime.utcnow().isoformat()
         }, websocket)
-    
+        if resume_from is not None:
+            # No await since registering, so replayed events queue ahead of live ones
+            self._resume(websocket, user_id, resume_from, log_id)
+
+    def _resume(self, websocket: WebSocket, user_id: int, resume_from: int, log_id: str) -> None:
+        missed = self.event_log.since(user_id, resume_from) if log_id == self.event_log.id else None
+        if missed is None:
+            self.resyncs += 1
+            self._deliver({
+                "type": "resync_required",
+                "seq": self.event_log.last_seq(user_id)
+            }, [websocket])
+            return
+        self.resumes += 1
+        for message in missed:
+            self._deliver(message, [websocket])
+        self._deliver({
+            "type": "resume_complete",
+            "replayed": len(missed),
+            "seq": self.event_log.last_seq(user_id)
+        }, [websocket])
+
     def disconnect(self, websocket: WebSocket):
-        metadata = self.connection_metadata.get(websocket)
-        if metadata:
-            user_id = metadata["user_id"]
-            if user_id in self.active_connections:
-                self.active_connections[user_id].discard(websocket)
-                if not self.active_connections[user_id]:
-                    del self.active_connections[user_id]
-            
-            del self.connection_metadata[websocket]
-    
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return
+        connection.stop()
+        for room in list(connection.rooms):
+            self.leave(websocket, room)
+        user_connections = self.active_connections.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.discard(websocket)
+            if not user_connections:
+                del self.active_connections[connection.user_id]
+
+    def join(self, websocket: WebSocket, room: str) -> bool:
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return False
+        if room not in connection.rooms and len(connection.rooms) >= settings.WS_MAX_ROOMS_PER_CONNECTION:
+            return False
+        connection.rooms.add(room)
+        self.rooms.setdefault(room, set()).add(websocket)
+        return True
+
+    def leave(self, websocket: WebSocket, room: str) -> None:
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.rooms.discard(room)
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(websocket)
+            if not members:
+                del self.rooms[room]
+
+    def touch(self, websocket: WebSocket) -> None:
+        """Record inbound traffic, which also answers any outstanding heartbeat"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.touch()
+
+    def sweep(self, now: float = None) -> None:
+        """Heartbeat idle connections and reap those that stopped answering"""
+        now = time.monotonic() if now is None else now
+        idle: List[Connection] = []
+        for connection in list(self.connections.values()):
+            if connection.pinged_at is not None:
+                if now - connection.pinged_at < settings.WS_PONG_TIMEOUT:
+                    continue
+                if connection.answers_heartbeats:
+                    self._reap(connection)
+                else:
+                    # Listen-only client: keep it, and heartbeat again after the next idle interval
+                    connection.pinged_at = None
+                    connection.last_activity = now
+            elif now - connection.last_activity >= settings.WS_PING_INTERVAL + connection.ping_jitter:
+                connection.pinged_at = now
+                idle.append(connection)
+        if idle:
+            self.pings_sent += len(idle)
+            self._deliver({
+                "type": WSEventType.HEARTBEAT,
+                "timestamp": datetime.utcnow().isoformat()
+            }, [connection.websocket for connection in idle])
+
+    def _reap(self, connection: Connection) -> None:
+        self.stale_disconnects += 1
+        metrics.increment_counter('WebSocketStaleConnection')
+        logger.info(f"Reaping WebSocket for user {connection.user_id}: no reply to heartbeat")
+        self.disconnect(connection.websocket)
+        asyncio.create_task(self._close(connection.websocket, STALE_CLOSE_CODE))
+
+    def allow_inbound(self, websocket: WebSocket) -> bool:
+        """Take a token from the connection's inbound bucket; False means drop the message"""
+        connection = self.connections.get(websocket)
+        if connection is None or connection.inbound.allow():
+            return True
+        self.throttled_messages += 1
+        return False
+
+    async def coalesce(self, websocket: WebSocket, key, send: Send) -> None:
+        """Forward a high-frequency event through the connection's coalescing window"""
+        connection = self.connections.get(websocket)
+        if connection is None:
+            return
+        if await connection.coalescer.submit(key, send):
+            self.coalesced_messages += 1
+
+    def _deliver(self, message: dict, websockets: Iterable[WebSocket], exclude: str = None) -> None:
+        # Serialized at most once per encoding in use among the recipients
+        payloads: Dict[str, Payload] = {}
+        # Copy first: overflow handling can disconnect sockets mid-loop
+        for websocket in list(websockets):
+            connection = self.connections.get(websocket)
+            if connection is None or connection.id == exclude:
+                continue
+            payload = payloads.get(connection.encoding)
+            if payload is None:
+                payload = payloads[connection.encoding] = encode_message(message, connection.encoding)
+            try:
+                connection.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._overflow(connection)
+
+    def _overflow(self, connection: Connection) -> None:
+        connection.dropped += 1
+        self.dropped_messages += 1
+        if self.overflow_policy != "disconnect":
+            return
+        self.slow_consumer_disconnects += 1
+        metrics.increment_counter('WebSocketSlowConsumer')
+        logger.warning(
+            f"Disconnecting slow WebSocket consumer for user {connection.user_id} "
+            f"({connection.queue.qsize()} messages queued)"
+        )
+        self.disconnect(connection.websocket)
+        asyncio.create_task(self._close(connection.websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _close(self, websocket: WebSocket, code: int) -> None:
         try:
-            await websocket.send_text(json.dumps(message))
-        except:
-            self.disconnect(websocket)
-    
+            await websocket.close(code=code)
+        except Exception as e:
+            logger.debug(f"Closing WebSocket failed: {e}")
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        self._deliver(message, [websocket])
+
     async def send_to_user(self, message: dict, user_id: int):
-        if user_id in self.active_connections:
-            disconnected = []
-            for websocket in self.active_connections[user_id].copy():
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except:
-                    disconnected.append(websocket)
-            
-            # Clean up disconnected websockets
-            for websocket in disconnected:
-                self.disconnect(websocket)
-    
+        user_connections = self.active_connections.get(user_id)
+        if user_connections:
+            self._deliver(message, user_connections)
+
     async def broadcast_to_all(self, message: dict):
-        disconnected = []
-        for user_connections in self.active_connections.values():
-            for websocket in user_connections.copy():
-                try:
-                    await websocket.send_text(json.dumps(message))
-                except:
-                    disconnected.append(websocket)
-        
-        # Clean up disconnected websockets
-        for websocket in disconnected:
-            self.disconnect(websocket)
-    
+        if self.connections:
+            self._deliver(message, self.connections)
+
+    async def send_to_room(self, message: dict, room: str, exclude: str = None):
+        """Send to a room's subscribers, optionally skipping the sending connection"""
+        members = self.rooms.get(room)
+        if members:
+            self._deliver(message, members, exclude)
+
     def get_user_count(self) -> int:
         return len(self.active_connections)
-    
+
     def get_connection_count(self) -> int:
-        return sum(len(connections) for connections in self.active_connections.values())
+        return len(self.connections)
+
+    def queue_stats(self) -> dict:
+        depths = [connection.queue.qsize() for connection in self.connections.values()]
+        return {
+            "queued_messages": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "queue_size": self.queue_size,
+            "dropped_messages": self.dropped_messages,
+            "slow_consumer_disconnects": self.slow_consumer_disconnects,
+            "throttled_messages": self.throttled_messages,
+            "coalesced_messages": self.coalesced_messages,
+            "resumes": self.resumes,
+            "resyncs": self.resyncs,
+            "pings_sent": self.pings_sent,
+            "stale_disconnects": self.stale_disconnects,
+        }
+
+def content_room(content_id: int) -> str:
+    return f"content:{content_id}"
+
+def user_room(user_id: int) -> str:
+    return f"user:{user_id}"
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -91,19 +337,38 @@ class WSEventType:
     CONTENT_CREATED = "content_created"
     CONTENT_UPDATED = "content_updated"
     CONTENT_DELETED = "content_deleted"
-    
+    # Bulk operations and imports: one event per chunk of ids
+    CONTENT_BATCH_CREATED = "content_batch_created"
+    CONTENT_BATCH_UPDATED = "content_batch_updated"
+    CONTENT_BATCH_DELETED = "content_batch_deleted"
+
     # User activity
     USER_ONLINE = "user_online"
     USER_OFFLINE = "user_offline"
-    
+
     # System events
     SYSTEM_NOTIFICATION = "system_notification"
     HEARTBEAT = "heartbeat"
-    
+
     # Collaboration events
     USER_VIEWING_CONTENT = "user_viewing_content"
     USER_EDITING_CONTENT = "user_editing_content"
 
+async def dispatch_event(event: dict):
+    """Deliver a backplane event to this process's sockets"""
+    if event.get("room"):
+        await manager.send_to_room(event["message"], event["room"], event.get("exclude"))
+    elif event.get("user_id"):
+        # Send to specific user, sequenced so a reconnect can resume
+        message = manager.event_log.append(event["user_id"], event["message"])
+        await manager.send_to_user(message, event["user_id"])
+    else:
+        # Broadcast to all users
+        await manager.broadcast_to_all(event["message"])
+
+# Reaches sockets held by other workers too when WS_BACKPLANE is shared
+backplane = create_backplane(dispatch_event)
+
 async def broadcast_content_event(event_type: str, content_data: dict, user_id: int = None):
     """Broadcast content-related events to relevant users"""
     message = {
@@ -112,32 +377,28 @@ async def broadcast_content_event(event_type: str, content_data: dict, user_id:
         "timestamp": datetime.utcnow().isoformat(),
         "user_id": user_id
     }
-    
-    if user_id:
-        # Send to specific user
-        await manager.send_to_user(message, user_id)
-    else:
-        # Broadcast to all users
-        await manager.broadcast_to_all(message)
 
-async def broadcast_user_activity(user_id: int, activity_type: str, data: dict = None):
-    """Broadcast user activity to other users"""
+    await backplane.publish({"message": message, "user_id": user_id})
+
+async def broadcast_user_activity(user_id: int, activity_type: str, data: dict = None, room: str = None, exclude: str = None):
+    """Send user activity to a room: the user's presence room unless another is given"""
     message = {
         "type": activity_type,
         "user_id": user_id,
         "data": data or {},
         "timestamp": datetime.utcnow().isoformat()
     }
-    
-    await manager.broadcast_to_all(message)
 
-# Heartbeat task to keep connections alive
+    await backplane.publish({"message": message, "room": room or user_room(user_id), "exclude": exclude})
+
+async def broadcast_to_room(room: str, message: dict, exclude: str = None):
+    await backplane.publish({"message": message, "room": room, "exclude": exclude})
+
+# Heartbeat task: pings idle connections and reaps dead ones
 async def heartbeat_task():
     while True:
-        await asyncio.sleep(30)  # Send heartbeat every 30 seconds
-        await manager.broadcast_to_all({
-            "type": WSEventType.HEARTBEAT,
-            "timestamp": datetime.utcnow().isoformat(),
-            "active_users": manager.get_user_count(),
-            "active_connections": manager.get_connection_count()
-        })
+        await asyncio.sleep(settings.WS_HEARTBEAT_TICK)
+        try:
+            manager.sweep()
+        except Exception as e:
+            logger.warning(f"WebSocket heartbeat sweep failed: {e}")
@@ -1,82 +1,186 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
-from app.websocket.manager import manager, WSEventType, broadcast_user_activity
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import get_current_user_websocket
-from app.models.user import User
-import json
+from app.websocket.codec import MessageError, decode_message, negotiate_subprotocol
+from app.websocket.events import event_bus
+from app.websocket.manager import (
+    manager, WSEventType, broadcast_user_activity, broadcast_to_room, content_room
+)
+from app.db.session import get_async_db
+from app.models.content import Content
+from typing import Optional
 import asyncio
+import functools
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int):
-    """Main WebSocket endpoint for real-time communication"""
-    
-    # Authenticate user (simplified for demo)
-    # In production, use proper JWT validation
+@router.websocket("/ws")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    resume_from: Optional[int] = Query(None, ge=0),
+    log_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Main WebSocket endpoint for real-time communication
+
+    Clients authenticate with their access token as ``?token=``; the socket
+    belongs to the token's user, and sockets without a valid token are closed
+    with 1008 before they are accepted. Clients may ask for a binary encoding
+    with the ``msgpack`` or ``msgpack.deflate`` subprotocol. Reconnecting
+    clients pass the ``seq`` and ``log_id`` they last saw to be sent the events
+    they missed, or ``resync_required`` if those are gone.
+    """
+
+    user = await get_current_user_websocket(websocket, token, db)
+    # The socket may stay open for hours; don't hold a database connection for it.
+    # A closed session stays usable and checks a connection out again on demand.
+    await db.close()
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    user_id = user.id
+
     try:
-        await manager.connect(websocket, user_id)
-        
-        # Notify other users that this user is online
+        subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+        await manager.connect(websocket, user_id, resume_from, log_id, subprotocol)
+
+        # Tell the user's presence room this user is online
         await broadcast_user_activity(user_id, WSEventType.USER_ONLINE)
-        
+
         try:
             while True:
                 # Receive message from client
-                data = await websocket.receive_text()
-                message = json.loads(data)
-                
+                try:
+                    message = await receive_message(websocket)
+                except MessageError as e:
+                    message, error = None, e
+                manager.touch(websocket)
+                if not manager.allow_inbound(websocket):
+                    continue
+                if message is None:
+                    await manager.send_personal_message({
+                        "type": "error",
+                        "message": f"Malformed message: {error}"
+                    }, websocket)
+                    continue
+
                 # Handle different message types
-                await handle_websocket_message(websocket, user_id, message)
-                
+                await handle_websocket_message(websocket, user_id, message, db)
+
         except WebSocketDisconnect:
             pass
-            
+
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.warning(f"WebSocket error for user {user_id}: {e}")
     finally:
         manager.disconnect(websocket)
-        # Notify other users that this user is offline
+        # Tell the user's presence room this user is offline
         await broadcast_user_activity(user_id, WSEventType.USER_OFFLINE)
 
-async def handle_websocket_message(websocket: WebSocket, user_id: int, message: dict):
+async def receive_message(websocket: WebSocket) -> dict:
+    """Next client message, from a JSON text frame or a binary MessagePack frame"""
+    received = await websocket.receive()
+    if received["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(received.get("code", 1000))
+    data = received.get("text")
+    return decode_message(received["bytes"] if data is None else data)
+
+async def can_join_room(db: AsyncSession, user_id: int, room) -> bool:
+    """Content rooms need the item to be the user's own or public; user rooms are the user's own"""
+    if not isinstance(room, str):
+        return False
+    kind, _, key = room.partition(":")
+    if not key.isdigit():
+        return False
+    if kind == "user":
+        return int(key) == user_id
+    if kind == "content":
+        try:
+            row = (await db.execute(
+                select(Content.user_id, Content.is_public).where(Content.id == int(key))
+            )).first()
+        finally:
+            await db.close()
+        return row is not None and (row.user_id == user_id or bool(row.is_public))
+    return False
+
+async def handle_websocket_message(websocket: WebSocket, user_id: int, message: dict, db: AsyncSession):
     """Handle incoming WebSocket messages"""
-    
+
     message_type = message.get("type")
-    data = message.get("data", {})
-    
+    data = message.get("data")
+    if not isinstance(data, dict):
+        data = {}
+    connection = manager.connections.get(websocket)
+    sender = connection.id if connection else None
+
     if message_type == "ping":
         # Respond to ping with pong
         await manager.send_personal_message({
             "type": "pong",
             "timestamp": message.get("timestamp")
         }, websocket)
-    
+
+    elif message_type == "pong":
+        # Reply to a server heartbeat; receiving it already marked the socket alive.
+        # From now on this client is expected to answer, and is reaped if it stops.
+        if connection:
+            connection.answers_heartbeats = True
+
+    elif message_type == "subscribe":
+        room = data.get("room", "")
+        if await can_join_room(db, user_id, room) and manager.join(websocket, room):
+            await manager.send_personal_message({"type": "subscribed", "room": room}, websocket)
+        else:
+            await manager.send_personal_message({
+                "type": "error",
+                "message": f"Cannot subscribe to {room}"
+            }, websocket)
+
+    elif message_type == "unsubscribe":
+        room = data.get("room", "")
+        if isinstance(room, str):
+            manager.leave(websocket, room)
+        await manager.send_personal_message({"type": "unsubscribed", "room": room}, websocket)
+
     elif message_type == "user_viewing_content":
-        # Broadcast that user is viewing specific content
+        # Tell the content's watchers that user is viewing it
         content_id = data.get("content_id")
-        if content_id:
+        if isinstance(content_id, int) and content_id:
             await broadcast_user_activity(user_id, WSEventType.USER_VIEWING_CONTENT, {
                 "content_id": content_id
-            })
-    
+            }, room=content_room(content_id), exclude=sender)
+
     elif message_type == "user_editing_content":
-        # Broadcast that user is editing specific content
+        # Tell the content's watchers that user is editing it
         content_id = data.get("content_id")
-        if content_id:
-            await broadcast_user_activity(user_id, WSEventType.USER_EDITING_CONTENT, {
-                "content_id": content_id,
-                "field": data.get("field"),
-                "cursor_position": data.get("cursor_position")
-            })
-    
+        if isinstance(content_id, int) and content_id:
+            # Sent per keystroke: only the latest cursor per window is forwarded
+            await manager.coalesce(websocket, (message_type, content_id), functools.partial(
+                broadcast_user_activity, user_id, WSEventType.USER_EDITING_CONTENT, {
+                    "content_id": content_id,
+                    "field": data.get("field"),
+                    "cursor_position": data.get("cursor_position")
+                }, room=content_room(content_id), exclude=sender
+            ))
+
     elif message_type == "typing_indicator":
-        # Broadcast typing indicator for collaborative editing
-        await manager.broadcast_to_all({
-            "type": "typing_indicator",
-            "user_id": user_id,
-            "content_id": data.get("content_id"),
-            "is_typing": data.get("is_typing", False)
-        })
+        # Typing indicator for collaborative editing, to the content's watchers
+        content_id = data.get("content_id")
+        if isinstance(content_id, int) and content_id:
+            await manager.coalesce(websocket, (message_type, content_id), functools.partial(
+                broadcast_to_room, content_room(content_id), {
+                    "type": "typing_indicator",
+                    "user_id": user_id,
+                    "content_id": content_id,
+                    "is_typing": data.get("is_typing", False)
+                }, exclude=sender
+            ))
 
 @router.get("/ws/stats")
 async def get_websocket_stats():
@@ -84,5 +188,9 @@ async def get_websocket_stats():
     return {
         "active_users": manager.get_user_count(),
         "active_connections": manager.get_connection_count(),
+        "active_rooms": len(manager.rooms),
+        **manager.queue_stats(),
+        "event_log": manager.event_log.stats(),
+        "event_bus": event_bus.stats(),
         "timestamp": asyncio.get_event_loop().time()
     }
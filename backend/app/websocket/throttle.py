@@ -0,0 +1,80 @@
+"""
+Inbound rate limiting and coalescing for WebSocket events
+
+Collaborative editors report typing and cursor position on every keystroke.
+Rebroadcasting each one multiplies by the room size, so high-frequency events
+go through a Coalescer: the first event for a key is forwarded at once, later
+ones within WS_COALESCE_WINDOW_MS only replace each other, and the latest is
+forwarded when the window closes. A TokenBucket per connection caps how many
+messages a client may send at all; the excess is dropped.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+Send = Callable[[], Awaitable[None]]
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._clock = clock
+        self._updated = clock()
+
+    def allow(self) -> bool:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class Coalescer:
+    """Forwards at most one event per key per window, always ending on the latest"""
+
+    def __init__(self, window_ms: float):
+        self.window = window_ms / 1000
+        self._latest: Dict[Hashable, Send] = {}
+        self._windows: Dict[Hashable, asyncio.Task] = {}
+
+    async def submit(self, key: Hashable, send: Send) -> bool:
+        """Forward ``send`` now or at the end of the key's window; True if it superseded a held event"""
+        if self.window <= 0:
+            await send()
+            return False
+        if key in self._windows:
+            superseded = key in self._latest
+            self._latest[key] = send
+            return superseded
+        await send()
+        self._windows[key] = asyncio.create_task(self._close_window(key))
+        return False
+
+    async def _close_window(self, key: Hashable) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                send = self._latest.pop(key, None)
+                if send is None:
+                    break
+                try:
+                    await send()
+                except Exception as e:
+                    logger.debug(f"Coalesced WebSocket event failed: {e}")
+        finally:
+            if self._windows.get(key) is asyncio.current_task():
+                del self._windows[key]
+
+    def pending(self) -> int:
+        return len(self._latest)
+
+    def cancel(self) -> None:
+        for task in self._windows.values():
+            task.cancel()
+        self._windows.clear()
+        self._latest.clear()
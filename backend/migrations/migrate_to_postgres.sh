@@ -43,7 +43,15 @@ if [ $? -ne 0 ]; then
     exit 1
 fi
 
-# Migrate data if SQLite database exists
+echo "Applying schema migrations..."
+python3 -m app.db.migrate upgrade
+if [ $? -ne 0 ]; then
+    echo "Error: Schema migrations failed"
+    exit 1
+fi
+
+# Migrate data if SQLite database exists. Schema migrations above ran against
+# empty tables; the data copy recomputes derived tables (user_tag_usage) itself.
 if [ -f "$SQLITE_DB_PATH" ]; then
     echo "Migrating data from SQLite to PostgreSQL..."
     python3 -m app.db.migrate migrate "$SQLITE_DB_PATH"
@@ -1,14 +1,30 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.db.session import Base, get_db
+from app.db.session import Base, get_db, get_async_db
+from app.monitoring.sql import instrument_engine
+from app.core.auth_cache import principal_cache
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: each TestClient may drive requests from a different event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    # Databases are recreated per test, so cached users would point at old rows
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
 
 @pytest.fixture(scope="function")
 def db():
@@ -27,7 +43,25 @@ def client(db):
             yield db
         finally:
             pass
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+@pytest.fixture
+def auth_token(client):
+    """Register "testuser" and return an access token for it"""
+    client.post("/api/v1/auth/register", json={
+        "email": "test@example.com", "username": "testuser", "password": "testpass123"
+    })
+    return client.post("/api/v1/auth/token", data={
+        "username": "testuser", "password": "testpass123"
+    }).json()["access_token"]
+
+@pytest.fixture
+def auth_headers(auth_token):
+    return {"Authorization": f"Bearer {auth_token}"}
@@ -0,0 +1,45 @@
+import time
+from app.core.auth_cache import Principal, PrincipalCache, principal_cache
+from app.models.user import User
+
+def test_cache_expires_and_evicts():
+    cache = PrincipalCache(max_size=2, ttl=60)
+    alice = Principal(id=1, username="alice", email="a@example.com")
+    cache.put("t1", alice)
+    cache.put("t2", Principal(id=2, username="bob", email="b@example.com"))
+    cache.get("t1")
+    cache.put("t3", Principal(id=3, username="carol", email="c@example.com"))
+
+    assert cache.get("t1") == alice
+    assert cache.get("t2") is None  # least recently used
+
+    cache.put("t4", alice, token_expires_at=time.time() - 1)
+    assert cache.get("t4") is None
+
+def test_repeat_requests_skip_user_lookup(client, auth_headers):
+    first = client.get("/api/v1/auth/me", headers=auth_headers)
+    second = client.get("/api/v1/auth/me", headers=auth_headers)
+
+    assert first.json() == second.json()
+    assert first.json()["username"] == "testuser"
+    assert first.headers["X-DB-Queries"] == "1"
+    assert second.headers["X-DB-Queries"] == "0"
+
+def test_user_changes_invalidate_cached_principal(client, auth_headers, db):
+    client.get("/api/v1/auth/me", headers=auth_headers)
+    assert principal_cache.stats()["size"] == 1
+
+    user = db.query(User).filter(User.username == "testuser").first()
+    user.email = "changed@example.com"
+    db.commit()
+
+    assert principal_cache.stats()["size"] == 0
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["email"] == "changed@example.com"
+
+def test_deleted_user_is_rejected(client, auth_headers, db):
+    client.get("/api/v1/auth/me", headers=auth_headers)
+
+    db.delete(db.query(User).filter(User.username == "testuser").first())
+    db.commit()
+
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 401
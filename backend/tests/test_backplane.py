@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from app.websocket.backplane import Backplane, LocalBackplane, PostgresBackplane, to_asyncpg_dsn, MAX_NOTIFY_BYTES
+
+class FakePostgres:
+    """In-memory stand-in for LISTEN/NOTIFY across asyncpg connections"""
+    def __init__(self):
+        self.listeners = []
+        self.notifies = []
+
+    async def connect(self, dsn):
+        return FakeConnection(self)
+
+class FakeConnection:
+    def __init__(self, hub):
+        self.hub = hub
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.hub.listeners.append((channel, self, callback))
+
+    async def execute(self, query, channel, payload):
+        assert "pg_notify" in query
+        self.hub.notifies.append(payload)
+        for listen_channel, conn, callback in list(self.hub.listeners):
+            if listen_channel == channel and not conn.closed:
+                asyncio.get_running_loop().call_soon(callback, conn, 1, channel, payload)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+def _recorder():
+    received = []
+    async def handler(event):
+        received.append(event)
+    return received, handler
+
+async def test_local_backplane_delivers_directly():
+    received, handler = _recorder()
+    await LocalBackplane(handler).publish({"message": {"type": "x"}, "user_id": 1})
+    assert received == [{"message": {"type": "x"}, "user_id": 1}]
+
+async def test_postgres_backplane_shares_batched_events():
+    hub = FakePostgres()
+    local_events, local_handler = _recorder()
+    remote_events, remote_handler = _recorder()
+    a = PostgresBackplane(local_handler, "postgresql://db", batch_ms=5, connect=hub.connect)
+    b = PostgresBackplane(remote_handler, "postgresql://db", batch_ms=5, connect=hub.connect)
+    await a.start()
+    await b.start()
+
+    events = [{"message": {"type": "content_created", "n": i}, "user_id": 7} for i in range(5)]
+    for event in events:
+        await a.publish(event)
+
+    # Local sockets are served without waiting for the round trip
+    assert local_events == events
+    await asyncio.sleep(0.05)
+    assert remote_events == events
+    assert len(hub.notifies) == 1
+    # The publisher ignores its own echo
+    assert local_events == events
+
+    await a.stop()
+    await b.stop()
+
+async def test_listener_reconnects_without_publishing():
+    hub = FakePostgres()
+    remote_events, remote_handler = _recorder()
+    a = PostgresBackplane(_recorder()[1], "postgresql://db", batch_ms=5, connect=hub.connect)
+    b = PostgresBackplane(remote_handler, "postgresql://db", batch_ms=5, connect=hub.connect, reconnect_s=0.01)
+    await a.start()
+    await b.start()
+
+    # b only listens; its LISTEN connection drops and comes back on its own
+    await b._listen_conn.close()
+    await asyncio.sleep(0.05)
+    assert b.reconnects == 1
+    assert b._publish_conn is None
+
+    event = {"message": {"type": "content_updated"}, "user_id": 7}
+    await a.publish(event)
+    await asyncio.sleep(0.05)
+    assert remote_events == [event]
+
+    await a.stop()
+    await b.stop()
+
+def test_backplane_requires_publish():
+    with pytest.raises(TypeError):
+        Backplane(None)
+
+def test_large_batches_split_under_notify_limit():
+    backplane = PostgresBackplane(None, "postgresql://db")
+    batch = [{"message": {"type": "x", "body": "y" * 1000}, "user_id": None} for _ in range(20)]
+
+    payloads = list(backplane._payloads(batch))
+
+    assert len(payloads) > 1
+    assert all(len(p) < 8000 for p in payloads)
+    assert MAX_NOTIFY_BYTES < 8000
+
+def test_asyncpg_dsn_drops_driver_suffix():
+    assert to_asyncpg_dsn("postgresql+psycopg2://u:p@h/db") == "postgresql://u:p@h/db"
+    assert to_asyncpg_dsn("postgresql://u:p@h/db") == "postgresql://u:p@h/db"
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import pytest
+import zlib
+from app.websocket.codec import (
+    FRAME_DEFLATE, FRAME_RAW, MessageError, decode_message, encode_message, negotiate_subprotocol, packb, unpackb
+)
+
+@pytest.mark.parametrize("value", [
+    None, True, False, 0, 127, 128, 255, 65536, 2**40, -1, -32, -33, -200, -40000, -2**40,
+    1.5, "", "héllo", "x" * 40, "y" * 300, "z" * 70000, b"\x00\x01",
+    [], [1, [2, [3]]], list(range(20)), {}, {"a": {"b": [1, None]}}, {str(i): i for i in range(20)},
+])
+def test_msgpack_round_trip(value):
+    assert unpackb(packb(value)) == value
+
+def test_msgpack_is_smaller_than_json():
+    message = {"type": "content_created", "user_id": 12, "data": {"id": 345, "title": "Title", "is_read": False}}
+    assert len(packb(message)) < len(json.dumps(message))
+
+def test_msgpack_rejects_unknown_and_truncated_data():
+    with pytest.raises(TypeError):
+        packb({"when": object()})
+    with pytest.raises(ValueError):
+        unpackb(packb("hello")[:-1])
+
+def test_large_frames_are_deflated_only_when_negotiated(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "WS_DEFLATE_THRESHOLD", 100)
+    small = {"type": "ping"}
+    large = {"type": "content_updated", "data": {"text": "lorem ipsum " * 50}}
+    
+    assert encode_message(small, "msgpack.deflate")[0] == FRAME_RAW
+    deflated = encode_message(large, "msgpack.deflate")
+    assert deflated[0] == FRAME_DEFLATE
+    assert len(deflated) < len(encode_message(large, "msgpack"))
+    assert encode_message(large, "msgpack")[0] == FRAME_RAW
+    assert decode_message(deflated) == large
+    assert decode_message(encode_message(large, "json")) == large
+
+def _deflate_frame(body: bytes) -> bytes:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return bytes([FRAME_DEFLATE]) + compressor.compress(body) + compressor.flush()
+
+def test_inflate_is_bounded(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "WS_MAX_INBOUND_BYTES", 1024)
+    bomb = _deflate_frame(packb({"type": "ping", "pad": "\0" * 10_000_000}))
+    assert len(bomb) < 20_000
+    
+    with pytest.raises(MessageError, match="exceeds 1024 bytes"):
+        decode_message(bomb)
+    assert decode_message(_deflate_frame(packb({"type": "ping"}))) == {"type": "ping"}
+
+@pytest.mark.parametrize("frame", [
+    b"",
+    b"\x07" + packb({"type": "ping"}),
+    bytes([FRAME_DEFLATE]) + b"not deflate",
+    bytes([FRAME_RAW]) + b"\x91" * 100_000,
+    bytes([FRAME_RAW]) + packb([1, 2]),
+    b"\x00\x81\x90\x00",  # map keyed by an array
+    b"\x00\x81\x80\x00",  # map keyed by a map
+    "[" * 100_000,
+    "not json",
+])
+def test_malformed_frames_raise_message_error(frame):
+    with pytest.raises(MessageError):
+        decode_message(frame)
+
+def test_negotiation_picks_first_supported_subprotocol():
+    assert negotiate_subprotocol(["wamp", "msgpack.deflate", "msgpack"]) == "msgpack.deflate"
+    assert negotiate_subprotocol(["wamp"]) is None
+    assert negotiate_subprotocol([]) is None
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+    
+    async def accept(self, subprotocol=None):
+        pass
+    
+    async def send_text(self, payload):
+        self.sent.append(payload)
+    
+    async def send_bytes(self, payload):
+        self.sent.append(payload)
+    
+    async def close(self, code=1000):
+        pass
+
+@pytest.mark.asyncio
+async def test_broadcast_encodes_once_per_encoding(monkeypatch):
+    from app.websocket import manager as manager_module
+    local = manager_module.ConnectionManager(queue_size=8)
+    sockets = {encoding: [FakeWebSocket(), FakeWebSocket()] for encoding in ("json", "msgpack")}
+    for encoding, websockets in sockets.items():
+        for ws in websockets:
+            await local.connect(ws, user_id=id(ws), subprotocol=None if encoding == "json" else encoding)
+    calls = []
+    real_encode = manager_module.encode_message
+    monkeypatch.setattr(manager_module, "encode_message", lambda m, encoding="json": calls.append(encoding) or real_encode(m, encoding))
+    
+    await local.broadcast_to_all({"type": "test"})
+    await asyncio.sleep(0.01)
+    
+    assert sorted(calls) == ["json", "msgpack"]
+    assert all(decode_message(ws.sent[-1]) == {"type": "test"} for websockets in sockets.values() for ws in websockets)
+    assert isinstance(sockets["msgpack"][0].sent[-1], bytes)
+    for websockets in sockets.values():
+        for ws in websockets:
+            local.disconnect(ws)
+
+def test_msgpack_subprotocol_end_to_end(client, auth_token):
+    with client.websocket_connect(f"/api/v1/ws?token={auth_token}", subprotocols=["msgpack"]) as websocket:
+        assert websocket.accepted_subprotocol == "msgpack"
+        assert decode_message(websocket.receive_bytes())["type"] == "connection_established"
+        websocket.send_bytes(encode_message({"type": "ping", "timestamp": 1}, "msgpack"))
+        assert decode_message(websocket.receive_bytes()) == {"type": "pong", "timestamp": 1}
+
+def test_malformed_frames_get_an_error_reply(client, auth_token):
+    with client.websocket_connect(f"/api/v1/ws?token={auth_token}", subprotocols=["msgpack"]) as websocket:
+        decode_message(websocket.receive_bytes())
+        for frame in (bytes([FRAME_RAW]) + b"\x91" * 100_000, b"\x00\x81\x90\x00"):
+            websocket.send_bytes(frame)
+            reply = decode_message(websocket.receive_bytes())
+            assert reply["type"] == "error" and reply["message"].startswith("Malformed message")
+        # The connection survives
+        websocket.send_bytes(encode_message({"type": "ping", "timestamp": 2}, "msgpack"))
+        assert decode_message(websocket.receive_bytes()) == {"type": "pong", "timestamp": 2}
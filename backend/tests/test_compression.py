@@ -0,0 +1,142 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+from app.core.config import settings
+from app.db.compression import compress_text, decompress_text, recompress_column, MARKER
+from app.models.content import Content
+
+ARTICLE = "Readable prose repeats itself quite a lot. " * 200
+
+@pytest.fixture
+def compression(monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", True)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_THRESHOLD", 1024)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_CODEC", "zlib")
+
+def test_large_values_round_trip_compressed(compression):
+    stored = compress_text(ARTICLE)
+
+    assert stored.startswith(MARKER + "z")
+    assert len(stored) < len(ARTICLE) / 5
+    assert decompress_text(stored) == ARTICLE
+
+def test_small_and_marker_values_stay_readable(compression):
+    assert compress_text("short note") == "short note"
+
+    tricky = MARKER + "z not actually compressed"
+    assert decompress_text(compress_text(tricky)) == tricky
+
+def test_compression_off_stores_plain_text(monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", False)
+
+    assert compress_text(ARTICLE) == ARTICLE
+
+def test_recompress_existing_rows(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'content.db'}")
+    table = Content.__table__
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE contents (id INTEGER PRIMARY KEY, title TEXT, content_type TEXT, content_text TEXT, updated_at TEXT)"
+        )
+        for i in range(5):
+            conn.exec_driver_sql(
+                "INSERT INTO contents (title, content_type, content_text) VALUES (?, 'note', ?)",
+                (f"Item {i}", ARTICLE if i % 2 else "tiny")
+            )
+
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", True)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_CODEC", "zlib")
+    assert recompress_column(engine, table, "content_text", batch_size=2) == 2
+    assert recompress_column(engine, table, "content_text", batch_size=2) == 0
+
+    with engine.connect() as conn:
+        raw = [value for (value,) in conn.execute(text("SELECT content_text FROM contents ORDER BY id"))]
+        decoded = conn.execute(select(table.c.content_text).order_by(table.c.id)).scalars().all()
+    assert [value.startswith(MARKER) for value in raw] == [False, True, False, True, False]
+    assert decoded == ["tiny", ARTICLE, "tiny", ARTICLE, "tiny"]
+
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", False)
+    assert recompress_column(engine, table, "content_text") == 2
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT content_text FROM contents WHERE id = 2")).scalar() == ARTICLE
+
+def test_recompress_skips_rows_edited_meanwhile(tmp_path, monkeypatch):
+    from app.db import compression as compression_module
+    engine = create_engine(f"sqlite:///{tmp_path / 'content.db'}")
+    table = Content.__table__
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE contents (id INTEGER PRIMARY KEY, title TEXT, content_type TEXT, content_text TEXT, updated_at TEXT)"
+        )
+        for i in range(2):
+            conn.exec_driver_sql(
+                "INSERT INTO contents (title, content_type, content_text) VALUES (?, 'note', ?)", (f"Item {i}", ARTICLE)
+            )
+
+    edited = "Edited after the batch was read. " * 100
+    real_decompress = compression_module.decompress_text
+    def decompress_and_edit(stored):
+        # A user edit commits while the batch is being re-encoded
+        with engine.begin() as conn:
+            conn.exec_driver_sql("UPDATE contents SET content_text = ? WHERE id = 1", (edited,))
+        return real_decompress(stored)
+    monkeypatch.setattr(compression_module, "decompress_text", decompress_and_edit)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", True)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_CODEC", "zlib")
+
+    assert recompress_column(engine, table, "content_text") == 1
+    with engine.connect() as conn:
+        stored = conn.execute(text("SELECT content_text FROM contents ORDER BY id")).scalars().all()
+    assert stored[0] == edited
+    assert stored[1].startswith(MARKER)
+
+def test_api_reads_compressed_bodies(client, compression):
+    client.post("/api/v1/auth/register", json={
+        "email": "test@example.com", "username": "testuser", "password": "testpass123"
+    })
+    token = client.post("/api/v1/auth/token", data={
+        "username": "testuser", "password": "testpass123"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    content_id = client.post("/api/v1/content", json={
+        "title": "Long read", "content_text": ARTICLE, "content_type": "article"
+    }, headers=headers).json()["id"]
+
+    assert client.get(f"/api/v1/content/{content_id}", headers=headers).json()["content_text"] == ARTICLE
+    excerpt = client.get("/api/v1/content?excerpt_length=30", headers=headers).json()[0]["excerpt"]
+    assert excerpt == ARTICLE[:30]
+
+def test_search_matches_compressed_bodies(client, db, compression, auth_headers):
+    body = ARTICLE + "The needle is near the end. " + ARTICLE
+    content_id = client.post("/api/v1/content", json={
+        "title": "Long read", "content_text": body, "content_type": "article"
+    }, headers=auth_headers).json()["id"]
+    client.post("/api/v1/content", json={
+        "title": "Short note", "content_text": "no match here", "content_type": "note"
+    }, headers=auth_headers)
+
+    stored = db.execute(text("SELECT content_text FROM contents WHERE id = :id"), {"id": content_id}).scalar()
+    assert stored.startswith(MARKER)
+
+    results = client.get("/api/v1/content/search?q=NEEDLE", headers=auth_headers).json()
+    assert [c["id"] for c in results] == [content_id]
+    assert client.get("/api/v1/content/search?q=n_edle%end", headers=auth_headers).json()[0]["id"] == content_id
+    assert client.get("/api/v1/content/search?q=haystack", headers=auth_headers).json() == []
+
+def test_compressed_search_scan_is_filtered_and_capped(client, compression, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_SEARCH_COMPRESSED_SCAN", 2)
+    body = ARTICLE + "needle " + ARTICLE
+    def create(content_type):
+        return client.post("/api/v1/content", json={
+            "title": "Long read", "content_text": body, "content_type": content_type
+        }, headers=auth_headers).json()["id"]
+    oldest, older, newer = create("article"), create("article"), create("article")
+    create("note")
+
+    # The newest note doesn't take one of the two scan slots of an article search
+    articles = client.get("/api/v1/content/search?q=needle&content_type=article", headers=auth_headers).json()
+    assert sorted(c["id"] for c in articles) == [older, newer]
+    # Past the cap, older compressed bodies only match by title
+    everything = client.get("/api/v1/content/search?q=needle", headers=auth_headers).json()
+    assert len(everything) == 2 and oldest not in [c["id"] for c in everything]
+    assert oldest in [c["id"] for c in client.get("/api/v1/content/search?q=long", headers=auth_headers).json()]
@@ -1,3 +1,5 @@
+import base64
+import json
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
@@ -465,6 +467,37 @@ def test_list_tags(auth_token):
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_tag_usage_counts_follow_content(auth_token, auth_token2):
+    """Per-user tag counts track create, update, bulk tagging and deletes"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    python_id = client.post("/api/v1/tags", json={"name": "python"}, headers=headers).json()["id"]
+    rust_id = client.post("/api/v1/tags", json={"name": "rust"}, headers=headers).json()["id"]
+    ids = [
+        client.post("/api/v1/content",
+            json={"title": f"Item {i}", "content_type": "note", "tag_ids": [python_id]},
+            headers=headers
+        ).json()["id"]
+        for i in range(3)
+    ]
+    client.put(f"/api/v1/content/{ids[0]}", json={"tag_ids": [rust_id]}, headers=headers)
+    client.post("/api/v1/data/bulk/tag", params={"tag_name": "rust"}, json=ids, headers=headers)
+    client.delete(f"/api/v1/content/{ids[1]}", headers=headers)
+    
+    response = client.get("/api/v1/tags/usage", headers=headers)
+    
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": rust_id, "name": "rust", "count": 2},
+        {"id": python_id, "name": "python", "count": 1},
+    ]
+    overview = client.get("/api/v1/analytics/overview", headers=headers).json()
+    assert overview["top_tags"] == response.json()
+    # Other users only see their own counts
+    assert client.get("/api/v1/tags/usage", headers={"Authorization": f"Bearer {auth_token2}"}).json() == []
+    
+    client.request("DELETE", "/api/v1/data/bulk/delete", json=ids, headers=headers)
+    assert client.get("/api/v1/tags/usage", headers=headers).json() == []
+
 def test_create_category_success(auth_token):
     """Test creating a category"""
     client = TestClient(app)
@@ -487,3 +520,150 @@ def test_list_categories(auth_token):
     
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def test_analytics_overview(auth_token):
+    """Test analytics overview on the async session"""
+    client.post(
+        "/api/v1/content",
+        json={"title": "Analytics Article", "content_type": "article"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    response = client.get("/api/v1/analytics/overview?days=7",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["overview"]["total_content"] == 1
+    assert data["content_by_type"] == [{"content_type": "article", "count": 1}]
+    assert len(data["content_over_time"]) == 7
+
+def _collect_pages(url, auth_token, limit=2, **query):
+    """Follow X-Next-Cursor until the last page"""
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": limit, **query}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params,
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+        assert response.status_code == 200
+        seen.extend(item["title"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen
+
+def test_list_content_cursor_pagination(auth_token):
+    """Cursor pages cover every item exactly once, newest first"""
+    for i in range(5):
+        client.post(
+            "/api/v1/content",
+            json={"title": f"Item {i}", "content_type": "note"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+    
+    titles = _collect_pages("/api/v1/content", auth_token)
+    
+    assert titles == [f"Item {i}" for i in reversed(range(5))]
+
+def test_search_cursor_pagination_by_title(auth_token):
+    for title in ["Delta", "Alpha", "Echo", "Charlie", "Bravo"]:
+        client.post(
+            "/api/v1/content",
+            json={"title": title, "content_type": "note"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+    
+    titles = _collect_pages("/api/v1/content/search", auth_token, sort_by="title", sort_order="asc")
+    
+    assert titles == ["Alpha", "Bravo", "Charlie", "Delta", "Echo"]
+
+def test_cursor_rejects_mismatched_sort(auth_token):
+    for i in range(2):
+        client.post(
+            "/api/v1/content",
+            json={"title": f"Item {i}", "content_type": "note"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+    response = client.get("/api/v1/content?limit=1",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    cursor = response.headers["X-Next-Cursor"]
+    
+    response = client.get("/api/v1/content/search",
+        params={"sort_by": "title", "cursor": cursor},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 400
+    
+    response = client.get("/api/v1/content?cursor=not-a-cursor",
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("values", [
+    [1],  # too few values
+    [[1], 2],
+    "xx",
+    [{"dt": "2026-01-01T00:00:00"}, "2"],
+    [{"dt": "yesterday"}, 2],
+    [{"dt": "2026-01-01T00:00:00"}, True],
+    [{"dt": "2026-01-01T00:00:00"}, 2, 3],
+])
+def test_cursor_rejects_tampered_values(auth_token, values):
+    raw = json.dumps({"s": "created_at:desc", "v": values}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    
+    assert client.get("/api/v1/content", params={"cursor": cursor}, headers=headers).status_code == 400
+    assert client.get("/api/v1/content/search", params={"cursor": cursor}, headers=headers).status_code == 400
+    assert client.get("/api/v1/sharing/discover", params={"cursor": cursor}).status_code == 400
+
+def test_discover_cursor_pagination(auth_token):
+    for i in range(3):
+        created = client.post(
+            "/api/v1/content",
+            json={"title": f"Public {i}", "content_type": "note"},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        ).json()
+        client.put(f"/api/v1/sharing/{created['id']}/share",
+            json={"is_public": True},
+            headers={"Authorization": f"Bearer {auth_token}"}
+        )
+    
+    titles = _collect_pages("/api/v1/sharing/discover", auth_token)
+    
+    assert titles == ["Public 2", "Public 1", "Public 0"]
+
+def test_list_content_sparse_fields(auth_token):
+    client.post(
+        "/api/v1/content",
+        json={"title": "Long read", "content_text": "x" * 5000, "content_type": "article"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    
+    response = client.get("/api/v1/content",
+        params={"fields": "title,tags"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 200
+    assert response.json() == [{"id": response.json()[0]["id"], "title": "Long read", "tags": []}]
+    
+    response = client.get("/api/v1/content/search",
+        params={"q": "Long", "excerpt_length": 20},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    item = response.json()[0]
+    assert item["excerpt"] == "x" * 20
+    assert "content_text" not in item
+    assert item["title"] == "Long read"
+
+def test_list_content_rejects_unknown_fields(auth_token):
+    response = client.get("/api/v1/content",
+        params={"fields": "title,password"},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == 400
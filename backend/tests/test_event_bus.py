@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import pytest
+from app.websocket import events as events_module
+from app.websocket.events import EventBus
+
+@pytest.mark.asyncio
+async def test_events_from_threads_are_delivered_in_one_batch(monkeypatch):
+    delivered = []
+    
+    async def fake_broadcast(event_type, data, user_id):
+        delivered.append((event_type, data["id"], user_id))
+    monkeypatch.setattr(events_module, "broadcast_content_event", fake_broadcast)
+    bus = EventBus()
+    bus.start()
+    
+    threads = [threading.Thread(target=bus.publish, args=("content_created", {"id": i}, 1)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    await asyncio.sleep(0.01)
+    
+    assert sorted(event[1] for event in delivered) == [0, 1, 2, 3, 4]
+    assert bus.stats()["batches"] == 1
+    assert bus.stats()["pending"] == 0
+
+def test_events_are_dropped_without_a_loop():
+    bus = EventBus()
+    bus.publish("content_created", {"id": 1}, 1)
+    assert bus.stats()["dropped"] == 1
+
+def test_content_changes_reach_the_owners_socket(client, auth_token, auth_headers):
+    with client.websocket_connect(f"/api/v1/ws?token={auth_token}") as websocket:
+        assert websocket.receive_json()["type"] == "connection_established"
+        
+        content_id = client.post("/api/v1/content", json={"title": "Live", "content_type": "note"}, headers=auth_headers).json()["id"]
+        client.put(f"/api/v1/content/{content_id}", json={"title": "Renamed"}, headers=auth_headers)
+        client.delete(f"/api/v1/content/{content_id}", headers=auth_headers)
+        
+        received = [websocket.receive_json() for _ in range(3)]
+    
+    assert [m["type"] for m in received] == ["content_created", "content_updated", "content_deleted"]
+    assert all(m["data"]["id"] == content_id for m in received)
+    assert received[1]["data"]["title"] == "Renamed"
+    seqs = [m["seq"] for m in received]
+    assert seqs == sorted(seqs) and len(set(seqs)) == 3
+
+def test_id_ranges_compacts_consecutive_runs():
+    from app.websocket.events import id_ranges
+    assert id_ranges([10, 9, 1, 2, 3, 7, 3]) == [[1, 3], 7, [9, 10]]
+    assert id_ranges([]) == []
+    assert id_ranges(range(1, 1001)) == [[1, 1000]]
+
+def test_batch_events_are_chunked(monkeypatch):
+    from app.core.config import settings
+    from app.websocket.events import publish_batch_event
+    published = []
+    monkeypatch.setattr(settings, "WS_BATCH_EVENT_SIZE", 3)
+    monkeypatch.setattr(events_module.event_bus, "publish", lambda *event: published.append(event))
+    
+    publish_batch_event("content_batch_deleted", [5, 1, 2, 3, 4, 9], 7, tag_added="x")
+    
+    assert published == [
+        ("content_batch_deleted", {"ids": [[1, 3]], "count": 3, "tag_added": "x"}, 7),
+        ("content_batch_deleted", {"ids": [[4, 5], 9], "count": 3, "tag_added": "x"}, 7),
+    ]
+
+def test_bulk_operations_emit_one_event_per_chunk(client, auth_token, auth_headers):
+    ids = [
+        client.post("/api/v1/content", json={"title": f"Item {i}", "content_type": "note"}, headers=auth_headers).json()["id"]
+        for i in range(4)
+    ]
+    
+    with client.websocket_connect(f"/api/v1/ws?token={auth_token}") as websocket:
+        websocket.receive_json()
+        client.post("/api/v1/data/bulk/tag?tag_name=batch", json=ids, headers=auth_headers)
+        client.request("DELETE", "/api/v1/data/bulk/delete", json=ids, headers=auth_headers)
+        
+        updated, deleted = websocket.receive_json(), websocket.receive_json()
+    
+    assert updated["type"] == "content_batch_updated"
+    assert updated["data"] == {"ids": [[ids[0], ids[-1]]], "count": 4, "tag_added": "batch"}
+    assert deleted["type"] == "content_batch_deleted"
+    assert deleted["data"]["count"] == 4
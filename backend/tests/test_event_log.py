@@ -0,0 +1,89 @@
+import asyncio
+import json
+import pytest
+from app.websocket.event_log import EventLog
+from app.websocket.manager import ConnectionManager
+
+def test_sequence_numbers_are_per_user():
+    log = EventLog(size=10, max_users=10)
+    assert log.append(1, {"type": "a"})["seq"] == 1
+    assert log.append(1, {"type": "b"})["seq"] == 2
+    assert log.append(2, {"type": "c"})["seq"] == 1
+    assert log.last_seq(1) == 2
+    assert log.last_seq(3) == 0
+
+def test_since_replays_or_signals_gap():
+    log = EventLog(size=3, max_users=10)
+    for n in range(5):
+        log.append(1, {"n": n})
+    
+    assert [e["seq"] for e in log.since(1, 2)] == [3, 4, 5]
+    assert log.since(1, 5) == []
+    assert log.since(1, 1) is None  # seq 2 already evicted
+    assert log.since(1, 9) is None  # issued by some other log
+
+def test_negative_resume_point_requires_resync():
+    log = EventLog(size=3, max_users=10)
+    assert log.since(1, -1) is None  # user with no logged events
+    log.append(1, {"n": 0})
+    assert log.since(1, -1) is None
+
+def test_endpoint_rejects_negative_resume_from(client, auth_token):
+    from starlette.websockets import WebSocketDisconnect
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(f"/api/v1/ws?token={auth_token}&resume_from=-1") as websocket:
+            websocket.receive_json()
+    assert exc.value.code == 1008
+
+def test_least_recently_active_users_are_evicted():
+    log = EventLog(size=3, max_users=2)
+    log.append(1, {})
+    log.append(2, {})
+    log.append(1, {})
+    log.append(3, {})
+    
+    assert log.last_seq(2) == 0
+    assert log.last_seq(1) == 2
+    assert log.stats()["users"] == 2
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+    
+    async def accept(self, subprotocol=None):
+        pass
+    
+    async def send_text(self, payload):
+        self.sent.append(json.loads(payload))
+    
+    async def close(self, code=1000):
+        pass
+
+@pytest.mark.asyncio
+async def test_reconnect_resumes_missed_events():
+    local = ConnectionManager(queue_size=32)
+    for n in range(4):
+        local.event_log.append(1, {"type": "content_created", "data": {"id": n}})
+    
+    ws = FakeWebSocket()
+    await local.connect(ws, user_id=1, resume_from=2, log_id=local.event_log.id)
+    await asyncio.sleep(0.01)
+    
+    welcome, *replayed, done = ws.sent
+    assert welcome["seq"] == 4 and welcome["log_id"] == local.event_log.id
+    assert [m["seq"] for m in replayed] == [3, 4]
+    assert done == {"type": "resume_complete", "replayed": 2, "seq": 4}
+    local.disconnect(ws)
+
+@pytest.mark.asyncio
+async def test_reconnect_to_another_log_requires_resync():
+    local = ConnectionManager(queue_size=32)
+    local.event_log.append(1, {"type": "content_created"})
+    
+    ws = FakeWebSocket()
+    await local.connect(ws, user_id=1, resume_from=1, log_id="some-other-worker")
+    await asyncio.sleep(0.01)
+    
+    assert ws.sent[-1] == {"type": "resync_required", "seq": 1}
+    assert local.queue_stats()["resyncs"] == 1
+    local.disconnect(ws)
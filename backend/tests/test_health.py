@@ -0,0 +1,69 @@
+from sqlalchemy import create_engine, event
+from app.db.session import Base
+from app.db.health import DatabaseHealthCheck
+from app.models.user import User
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'health.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+def _record_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, stmt, *args: statements.append(stmt))
+    return statements
+
+def test_health_snapshot_is_cached(tmp_path):
+    engine = _engine(tmp_path)
+    checker = DatabaseHealthCheck(engine)
+    checker.tick()
+    statements = _record_statements(engine)
+    
+    first = checker.full_health_check()
+    second = checker.full_health_check()
+    
+    assert statements == []
+    assert first["connection"] is True
+    assert second["samples"] == 1
+    assert first["performance"]["status"] in ("healthy", "slow")
+
+def test_row_counts_use_catalog_estimates(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        for i in range(3):
+            conn.execute(User.__table__.insert().values(email=f"u{i}@example.com", username=f"u{i}", hashed_password="x"))
+        conn.exec_driver_sql("ANALYZE")
+    checker = DatabaseHealthCheck(engine)
+    statements = _record_statements(engine)
+    
+    tables = checker.refresh_tables()
+    
+    assert tables["users"] == {"exists": True, "count": 3, "estimated": True}
+    assert tables["contents"]["exists"] is True
+    assert not any("COUNT(" in stmt.upper() for stmt in statements)
+
+def test_ring_buffer_is_bounded(tmp_path):
+    checker = DatabaseHealthCheck(_engine(tmp_path), window=5)
+    
+    for _ in range(8):
+        checker.sample()
+    
+    snapshot = checker.snapshot()
+    assert snapshot["samples"] == 5
+    assert snapshot["success_rate"] == 1.0
+
+def test_unreachable_database_reported_unhealthy(tmp_path):
+    checker = DatabaseHealthCheck(create_engine(f"sqlite:///{tmp_path / 'missing' / 'db.sqlite'}"))
+    
+    snapshot = checker.full_health_check()
+    
+    assert snapshot["connection"] is False
+    assert snapshot["performance"]["status"] == "unhealthy"
+
+def test_detailed_health_endpoint(client):
+    response = client.get("/health/detailed")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    assert "tables" in data["database"]
@@ -0,0 +1,77 @@
+from sqlalchemy import create_engine, inspect
+from app.db.session import Base
+from app.db.migrations import apply_migrations, current_version, pending_migrations, load_migrations
+
+def _legacy_engine(tmp_path):
+    """Database created from the models, then stripped of the new indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for module in load_migrations():
+            for name, _, _ in getattr(module, "INDEXES", []):
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+    return engine
+
+def _index_names(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+def test_apply_migrations_creates_composite_indexes(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    assert "ix_contents_user_id_created_at" not in _index_names(engine, "contents")
+
+    applied = apply_migrations(engine)
+
+    assert applied == [1, 2]
+    assert current_version(engine) == 2
+    assert {
+        "ix_contents_user_id_created_at",
+        "ix_contents_user_id_category_id",
+        "ix_contents_user_id_content_type",
+        "ix_contents_is_public_created_at",
+    } <= _index_names(engine, "contents")
+    assert "ix_content_tags_tag_id_content_id" in _index_names(engine, "content_tags")
+    assert "ix_import_logs_source_id" in _index_names(engine, "import_logs")
+
+def test_apply_migrations_is_idempotent(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    apply_migrations(engine)
+
+    assert apply_migrations(engine) == []
+    assert pending_migrations(engine) == []
+
+def test_fresh_schema_matches_migrations(tmp_path):
+    """create_all already builds the indexes, so migrating a fresh database is a no-op"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(bind=engine)
+    before = _index_names(engine, "contents")
+
+    apply_migrations(engine)
+
+    assert _index_names(engine, "contents") == before
+
+def test_tag_usage_migration_backfills_counts(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO tags (id, name) VALUES (1, 'python'), (2, 'rust')")
+        conn.exec_driver_sql(
+            "INSERT INTO contents (id, user_id, title, content_type) VALUES (1, 7, 'a', 'note'), (2, 7, 'b', 'note'), (3, 8, 'c', 'note')"
+        )
+        conn.exec_driver_sql("INSERT INTO content_tags VALUES (1, 1), (2, 1), (2, 2), (3, 1)")
+
+    apply_migrations(engine)
+
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql("SELECT user_id, tag_id, count FROM user_tag_usage ORDER BY user_id, tag_id").all()
+    assert [tuple(row) for row in rows] == [(7, 1, 2), (7, 2, 1), (8, 1, 1)]
+
+def test_migrations_run_at_startup_not_import(monkeypatch):
+    from fastapi.testclient import TestClient
+    import app.main as main
+    calls = []
+    monkeypatch.setattr(main, "apply_migrations", lambda engine: calls.append(engine) or [])
+
+    assert calls == []
+    with TestClient(main.app):
+        pass
+
+    assert calls == [main.engine]
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.password_hashing import PasswordHasher, hash_rounds, needs_rehash
+from app.models.user import User
+
+async def test_saturated_hasher_rejects_fast():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+    release = threading.Event()
+    running = [asyncio.create_task(hasher.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HTTPException) as exc:
+        await hasher.run(release.wait)
+
+    assert exc.value.status_code == 503
+    assert hasher.stats()["queued"] == 1
+    assert hasher.stats()["rejected"] == 1
+    release.set()
+    await asyncio.gather(*running)
+    assert hasher.stats()["pending"] == 0
+    hasher.shutdown()
+
+def test_rehash_detection(monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    old = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=4)).decode()
+
+    assert hash_rounds(old) == 4
+    assert needs_rehash(old)
+    assert not needs_rehash(bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=5)).decode())
+    # Hashes stronger than configured are not downgraded
+    assert not needs_rehash(bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=6)).decode())
+
+def test_login_upgrades_hash_cost(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    client.post("/api/v1/auth/register", json={
+        "email": "test@example.com", "username": "testuser", "password": "testpass123"
+    })
+    assert hash_rounds(db.query(User).one().hashed_password) == 4
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    response = client.post("/api/v1/auth/token", data={"username": "testuser", "password": "testpass123"})
+
+    assert response.status_code == 200
+    db.expire_all()
+    assert hash_rounds(db.query(User).one().hashed_password) == 5
+
+async def test_cancelled_request_keeps_slot_until_job_finishes():
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    release = threading.Event()
+    request = asyncio.create_task(hasher.run(release.wait))
+    await asyncio.sleep(0.05)
+    request.cancel()
+    await asyncio.sleep(0.05)
+
+    # The abandoned job is still running on the pool
+    assert hasher.stats()["pending"] == 1
+    with pytest.raises(HTTPException):
+        await hasher.run(release.wait)
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert hasher.stats()["pending"] == 0
+    hasher.shutdown()
@@ -0,0 +1,91 @@
+import logging
+import pytest
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.monitoring.sql import (
+    QueryStats, instrument_engine, start_request_stats, end_request_stats,
+    statement_shape, redact_parameters
+)
+
+def test_statement_shape_collapses_in_lists_and_literals():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT * FROM t WHERE id IN (?)")
+    assert statement_shape("SELECT * FROM t LIMIT 10") == statement_shape("SELECT * FROM t LIMIT 50")
+
+def test_redacted_parameters_hide_values():
+    assert redact_parameters(("secret", 42)) == "(str, int)"
+    assert "secret" not in redact_parameters({"password": "secret"})
+
+def test_n_plus_one_detection():
+    stats = QueryStats()
+    for i in range(settings.N_PLUS_ONE_THRESHOLD):
+        stats.record(f"SELECT * FROM tags WHERE id = {i}", 1.0)
+    stats.record("SELECT * FROM contents", 5.0)
+    
+    assert stats.count == settings.N_PLUS_ONE_THRESHOLD + 1
+    assert stats.n_plus_one() == [("SELECT * FROM tags WHERE id = N", settings.N_PLUS_ONE_THRESHOLD)]
+    assert stats.slowest[0] == (5.0, "SELECT * FROM contents")
+
+def test_engine_events_feed_request_stats_and_slow_log(monkeypatch, caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+    
+    stats, token = start_request_stats()
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.monitoring.sql"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT :value"), {"value": "top-secret"})
+                conn.execute(text("SELECT 2"))
+    finally:
+        end_request_stats(token)
+    
+    assert stats.count == 2
+    assert stats.total_ms > 0
+    assert "Slow query" in caplog.text
+    assert "top-secret" not in caplog.text
+
+def test_db_queries_header(client, auth_headers):
+    response = client.get("/api/v1/content", headers=auth_headers)
+    
+    assert response.status_code == 200
+    # user lookup + content page
+    assert int(response.headers["X-DB-Queries"]) >= 2
+    assert "X-DB-Time" in response.headers
+
+def _create_tagged_content(client, headers, count):
+    category_id = client.post("/api/v1/categories", json={"name": "reading"}, headers=headers).json()["id"]
+    tag_ids = [client.post("/api/v1/tags", json={"name": f"tag{i}"}, headers=headers).json()["id"] for i in range(2)]
+    for i in range(count):
+        client.post("/api/v1/content", json={
+            "title": f"Item {i}", "content_type": "note", "category_id": category_id, "tag_ids": tag_ids
+        }, headers=headers)
+
+@pytest.mark.parametrize("items", [2, 12])
+def test_content_list_query_count_is_constant(client, auth_headers, items):
+    _create_tagged_content(client, auth_headers, items)
+    
+    for url in ["/api/v1/content", "/api/v1/content/search?q=Item"]:
+        response = client.get(url, headers=auth_headers)
+        assert len(response.json()) == items
+        assert all(item["category"] and len(item["tags"]) == 2 for item in response.json())
+        # page (category joined) + tags for the whole page; the user comes from the token cache
+        assert response.headers["X-DB-Queries"] == "2"
+
+def test_discover_loads_owners_in_one_query(client, auth_headers):
+    for i in range(4):
+        content_id = client.post("/api/v1/content", json={"title": f"Public {i}", "content_type": "note"}, headers=auth_headers).json()["id"]
+        client.put(f"/api/v1/sharing/{content_id}/share", json={"is_public": True}, headers=auth_headers)
+    
+    response = client.get("/api/v1/sharing/discover")
+    
+    assert [item["owner_username"] for item in response.json()] == ["testuser"] * 4
+    assert response.headers["X-DB-Queries"] == "1"
+
+def test_sparse_content_list_skips_relationship_queries(client, auth_headers):
+    _create_tagged_content(client, auth_headers, 3)
+    
+    response = client.get("/api/v1/content?fields=title", headers=auth_headers)
+    
+    assert [set(item) for item in response.json()] == [{"id", "title"}] * 3
+    # just the page; no user, tag or body loads
+    assert response.headers["X-DB-Queries"] == "1"
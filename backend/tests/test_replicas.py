@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import text
+from app.db.session import Base
+from app.db import replicas
+from app.db.replicas import ReplicaRouter
+from app.models.user import User
+from app.models.content import Content
+
+@pytest.fixture
+def replica_router(tmp_path, monkeypatch):
+    """Router over two SQLite replica files, installed as the app's router"""
+    router = ReplicaRouter(
+        [f"sqlite:///{tmp_path / 'replica_a.db'}", f"sqlite:///{tmp_path / 'replica_b.db'}"],
+        sticky_seconds=60,
+        retry_seconds=60
+    )
+    for replica in router.replicas:
+        Base.metadata.create_all(bind=replica.engine)
+    monkeypatch.setattr(replicas, "replica_router", router)
+    yield router
+    for replica in router.replicas:
+        replica.engine.dispose()
+
+def _replica_file(connection):
+    return connection.execute(text("PRAGMA database_list")).fetchone()[2]
+
+def test_round_robin_across_replicas(replica_router):
+    picked = []
+    for _ in range(4):
+        with replica_router.connect() as conn:
+            picked.append(_replica_file(conn))
+    
+    assert picked[0] != picked[1]
+    assert picked[0] == picked[2] and picked[1] == picked[3]
+
+def test_failover_skips_unreachable_replica(tmp_path):
+    router = ReplicaRouter(
+        [f"sqlite:///{tmp_path / 'missing' / 'replica.db'}", f"sqlite:///{tmp_path / 'replica.db'}"],
+        sticky_seconds=60,
+        retry_seconds=60
+    )
+    
+    for _ in range(3):
+        with router.connect() as conn:
+            assert _replica_file(conn).endswith("replica.db")
+            assert "missing" not in _replica_file(conn)
+    assert router.replicas[0].down_until > 0
+    assert router.candidates() == [router.replicas[1]]
+
+def test_all_replicas_down_falls_back_to_primary(tmp_path):
+    router = ReplicaRouter([f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"], sticky_seconds=60, retry_seconds=60)
+    
+    assert router.connect() is None
+
+def test_sticky_window_after_write():
+    router = ReplicaRouter([], sticky_seconds=60, retry_seconds=60)
+    assert not router.is_sticky("client")
+    
+    router.mark_write("client")
+    
+    assert router.is_sticky("client")
+    assert not router.is_sticky("other-client")
+
+def test_discover_reads_from_replica(client, replica_router):
+    # Seed only the replicas; the primary test database has no public content
+    for replica in replica_router.replicas:
+        with replica.engine.begin() as conn:
+            conn.execute(User.__table__.insert().values(id=1, email="r@example.com", username="replica", hashed_password="x"))
+            conn.execute(Content.__table__.insert().values(
+                user_id=1, title="From replica", content_type="note", is_public=True
+            ))
+    
+    response = client.get("/api/v1/sharing/discover")
+    
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["From replica"]
+
+def test_writer_reads_from_primary(client, replica_router, auth_headers):
+    client.post("/api/v1/content", json={"title": "Fresh write", "content_type": "note"}, headers=auth_headers)
+    response = client.get("/api/v1/content", headers=auth_headers)
+    
+    # The replicas are empty, so the item is only visible when pinned to the primary
+    assert [item["title"] for item in response.json()] == ["Fresh write"]
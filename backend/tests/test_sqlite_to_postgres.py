@@ -0,0 +1,141 @@
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from app.core.config import settings
+from app.db.compression import MARKER
+from app.db.session import Base
+from app.db.sqlite_to_postgres import SQLiteToPostgresMigrator, dependency_levels, copy_text_value, migration_checkpoints
+from app.models.user import User
+from app.models.content import Content
+from app.models.tag import Tag, UserTagUsage, content_tags
+from app.models.user_preferences import UserPreferences
+
+@pytest.fixture
+def source_path(tmp_path):
+    path = tmp_path / "source.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert().values(id=1, email="a@example.com", username="a", hashed_password="x"))
+        conn.execute(Tag.__table__.insert().values(id=1, name="python"))
+        conn.execute(Content.__table__.insert(), [
+            {"id": i, "user_id": 1, "title": f"Item {i}", "content_type": "note", "is_public": i % 2 == 0,
+             "content_text": "line\twith\ttabs\nand newlines"}
+            for i in range(1, 8)
+        ])
+        conn.execute(content_tags.insert(), [{"content_id": i, "tag_id": 1} for i in range(1, 8)])
+        conn.execute(UserPreferences.__table__.insert().values(user_id=1, dashboard_layout={"show_stats": False}))
+    engine.dispose()
+    return str(path)
+
+@pytest.fixture
+def target_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+def test_dependency_levels_order_parents_first():
+    levels = [[t.name for t in level] for level in dependency_levels(Base.metadata.sorted_tables)]
+    position = {name: i for i, level in enumerate(levels) for name in level}
+    
+    assert position["users"] < position["contents"]
+    assert position["contents"] < position["content_tags"]
+    assert position["tags"] < position["content_tags"]
+    assert position["content_sources"] < position["import_logs"]
+
+def test_migrates_all_rows_in_chunks(source_path, target_engine):
+    copied = SQLiteToPostgresMigrator(source_path, target_engine, chunk_size=2, workers=2).run()
+    
+    assert copied["contents"] == 7
+    assert copied["content_tags"] == 7
+    assert _count(target_engine, Content.__table__) == 7
+    with target_engine.connect() as conn:
+        row = conn.execute(select(Content.__table__).where(Content.__table__.c.id == 2)).first()
+        prefs = conn.execute(select(UserPreferences.__table__)).first()
+    assert row.is_public is True
+    assert row.content_text == "line\twith\ttabs\nand newlines"
+    assert prefs.dashboard_layout == {"show_stats": False}
+
+def test_tag_usage_is_rebuilt_after_copy(source_path, target_engine):
+    # The source predates user_tag_usage
+    source = sqlite3.connect(source_path)
+    source.execute("DROP TABLE user_tag_usage")
+    source.commit()
+    source.close()
+    
+    SQLiteToPostgresMigrator(source_path, target_engine).run()
+    
+    with target_engine.connect() as conn:
+        usage = conn.execute(select(UserTagUsage.user_id, UserTagUsage.tag_id, UserTagUsage.count)).all()
+    assert [tuple(row) for row in usage] == [(1, 1, 7)]
+
+def test_resumes_after_failure_without_duplicates(source_path, target_engine, monkeypatch):
+    migrator = SQLiteToPostgresMigrator(source_path, target_engine, chunk_size=2, workers=1)
+    original_load = migrator._load_chunk
+    loaded = []
+    
+    def flaky_load(conn, table, columns, rows):
+        if table.name == "contents" and len(loaded) == 2:
+            raise RuntimeError("connection lost")
+        if table.name == "contents":
+            loaded.append(len(rows))
+        original_load(conn, table, columns, rows)
+    
+    monkeypatch.setattr(migrator, "_load_chunk", flaky_load)
+    with pytest.raises(RuntimeError):
+        migrator.run()
+    assert _count(target_engine, Content.__table__) == 4
+    
+    monkeypatch.setattr(migrator, "_load_chunk", original_load)
+    copied = migrator.run()
+    
+    assert copied["contents"] == 7
+    assert _count(target_engine, Content.__table__) == 7
+    with target_engine.connect() as conn:
+        completed = conn.execute(select(migration_checkpoints.c.completed)).scalars().all()
+    assert all(completed)
+
+def test_restart_recopies_from_scratch(source_path, target_engine):
+    migrator = SQLiteToPostgresMigrator(source_path, target_engine, chunk_size=3)
+    migrator.run()
+    
+    copied = migrator.run(restart=True)
+    
+    assert copied["contents"] == 7
+    assert _count(target_engine, Content.__table__) == 7
+
+def test_copy_text_value_escapes():
+    column = Content.__table__.c.content_text
+    assert copy_text_value(None, column) == "\\N"
+    assert copy_text_value("a\tb\nc\\d", column) == "a\\tb\\nc\\\\d"
+    assert copy_text_value(1, Content.__table__.c.is_public) == "t"
+
+def test_compressed_bodies_copied_verbatim(tmp_path, target_engine, monkeypatch):
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION", True)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_THRESHOLD", 64)
+    monkeypatch.setattr(settings, "CONTENT_COMPRESSION_CODEC", "zlib")
+    article = "Readable prose repeats itself quite a lot. " * 50
+    path = tmp_path / "compressed.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert().values(id=1, email="a@example.com", username="a", hashed_password="x"))
+        conn.execute(Content.__table__.insert(), [
+            {"id": 1, "user_id": 1, "title": "Long", "content_type": "article", "content_text": article},
+            {"id": 2, "user_id": 1, "title": "Marked", "content_type": "note", "content_text": MARKER + "plain"},
+        ])
+        source_stored = conn.execute(text("SELECT content_text FROM contents ORDER BY id")).scalars().all()
+    engine.dispose()
+
+    SQLiteToPostgresMigrator(str(path), target_engine).run()
+
+    with target_engine.connect() as conn:
+        assert conn.execute(text("SELECT content_text FROM contents ORDER BY id")).scalars().all() == source_stored
+        bodies = conn.execute(select(Content.content_text).order_by(Content.id)).scalars().all()
+    assert source_stored[0].startswith(MARKER + "z")
+    assert bodies == [article, MARKER + "plain"]
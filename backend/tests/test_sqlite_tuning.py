@@ -0,0 +1,59 @@
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.sqlite import apply_sqlite_pragmas, run_sqlite_maintenance, sqlite_engine_kwargs, is_sqlite_file
+
+def _pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+def test_sqlite_profile_applied_on_connect(tmp_path):
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    engine = create_engine(url, **sqlite_engine_kwargs(url))
+    apply_sqlite_pragmas(engine)
+    
+    with engine.connect() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+        assert _pragma(conn, "synchronous") == 1  # NORMAL
+        assert _pragma(conn, "temp_store") == 2  # MEMORY
+        assert _pragma(conn, "busy_timeout") == 5000
+        assert _pragma(conn, "cache_size") == -65536
+    assert engine.pool.size() == 10
+
+async def test_sqlite_profile_applied_to_async_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tuned.db'}")
+    apply_sqlite_pragmas(engine.sync_engine)
+    
+    async with engine.connect() as conn:
+        assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+        assert (await conn.exec_driver_sql("PRAGMA synchronous")).scalar() == 1
+    await engine.dispose()
+
+def _tables(engine):
+    with engine.connect() as conn:
+        return {name for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def test_sqlite_maintenance_runs(tmp_path):
+    path = tmp_path / 'tuned.db'
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **sqlite_engine_kwargs(url))
+    apply_sqlite_pragmas(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+        conn.exec_driver_sql("CREATE INDEX ix_t_v ON t (v)")
+        for i in range(200):
+            conn.exec_driver_sql(f"INSERT INTO t VALUES ({i}, 'v{i % 5}')")
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT id FROM t WHERE v = 'v1'").all()
+    size_before = path.stat().st_size
+    assert "sqlite_stat1" not in _tables(engine)
+    
+    run_sqlite_maintenance(engine)
+    
+    # PRAGMA optimize gathered statistics for the queried index
+    assert "sqlite_stat1" in _tables(engine)
+    # The checkpoint copied the WAL's pages into the database file
+    assert path.stat().st_size > size_before
+
+def test_memory_database_keeps_default_pool():
+    assert not is_sqlite_file("sqlite://")
+    assert not is_sqlite_file("sqlite:///:memory:")
+    assert "pool_size" not in sqlite_engine_kwargs("sqlite://")
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import pytest
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.api.thread_pools import ThreadPool, pooled_route, thread_pool
+
+async def test_pool_rejects_when_no_thread_frees_up():
+    pool = ThreadPool("test", size=1, queue_timeout=0.05)
+    release = threading.Event()
+    running = asyncio.create_task(pool.run(release.wait))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(HTTPException) as exc:
+        await pool.run(lambda: None)
+
+    assert exc.value.status_code == 503
+    stats = pool.stats()
+    assert stats["active"] == 1 and stats["queued"] == 0 and stats["rejected"] == 1
+    release.set()
+    await running
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+def test_sync_endpoints_run_on_their_pool():
+    router = APIRouter(route_class=pooled_route("crud"))
+
+    @router.get("/light")
+    def light(name: str = "x"):
+        return {"thread": threading.current_thread().name, "name": name}
+
+    @router.get("/heavy")
+    @thread_pool("heavy")
+    def heavy():
+        return {"thread": threading.current_thread().name}
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    light_response = client.get("/light?name=y").json()
+    assert light_response["thread"].startswith("pool-crud")
+    assert light_response["name"] == "y"
+    assert client.get("/heavy").json()["thread"].startswith("pool-heavy")
+
+def test_query_stats_follow_pooled_endpoints(client, auth_headers):
+    response = client.get("/api/v1/categories", headers=auth_headers)
+
+    assert response.status_code == 200
+    # The user lookup on the loop plus the category query on the pool thread;
+    # without the copied context the pooled query would go uncounted
+    assert response.headers["X-DB-Queries"] == "2"
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import pytest
+from app.websocket.throttle import Coalescer, TokenBucket
+from app.websocket.manager import ConnectionManager, content_room
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_drops_excess_and_refills():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=3, clock=clock)
+    
+    assert [bucket.allow() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.1
+    assert bucket.allow()
+    assert not bucket.allow()
+    clock.now += 10
+    assert sum(bucket.allow() for _ in range(10)) == 3
+
+@pytest.mark.asyncio
+async def test_coalescer_forwards_first_and_latest():
+    coalescer = Coalescer(window_ms=30)
+    sent = []
+    
+    def event(n):
+        async def send():
+            sent.append(n)
+        return send
+    
+    superseded = [await coalescer.submit("k", event(n)) for n in range(10)]
+    assert sent == [0]
+    await asyncio.sleep(0.05)
+    assert sent == [0, 9]
+    assert superseded.count(True) == 8
+    
+    await asyncio.sleep(0.05)
+    await coalescer.submit("k", event(10))
+    assert sent == [0, 9, 10]
+    coalescer.cancel()
+
+@pytest.mark.asyncio
+async def test_coalescer_keys_are_independent():
+    coalescer = Coalescer(window_ms=30)
+    sent = []
+    
+    async def send_a():
+        sent.append("a")
+    
+    async def send_b():
+        sent.append("b")
+    
+    await coalescer.submit(("typing_indicator", 1), send_a)
+    await coalescer.submit(("typing_indicator", 2), send_b)
+    assert sent == ["a", "b"]
+    coalescer.cancel()
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+    
+    async def accept(self, subprotocol=None):
+        pass
+    
+    async def send_text(self, payload):
+        self.sent.append(json.loads(payload))
+    
+    async def close(self, code=1000):
+        pass
+
+@pytest.mark.asyncio
+async def test_keystroke_burst_reaches_room_as_two_messages(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "WS_COALESCE_WINDOW_MS", 30)
+    local = ConnectionManager(queue_size=64)
+    editor, watcher = FakeWebSocket(), FakeWebSocket()
+    await local.connect(editor, user_id=1)
+    await local.connect(watcher, user_id=2)
+    room = content_room(5)
+    local.join(watcher, room)
+    
+    for position in range(20):
+        message = {"type": "user_editing_content", "cursor_position": position}
+        await local.coalesce(editor, ("user_editing_content", 5), lambda m=message: local.send_to_room(m, room))
+    await asyncio.sleep(0.06)
+    
+    positions = [m["cursor_position"] for m in watcher.sent if m["type"] == "user_editing_content"]
+    assert positions == [0, 19]
+    assert local.queue_stats()["coalesced_messages"] == 18
+    local.disconnect(editor)
+    local.disconnect(watcher)
+
+@pytest.mark.asyncio
+async def test_manager_counts_throttled_messages(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "WS_INBOUND_BURST", 2)
+    monkeypatch.setattr(settings, "WS_INBOUND_RATE", 0.001)
+    local = ConnectionManager(queue_size=8)
+    ws = FakeWebSocket()
+    await local.connect(ws, user_id=1)
+    
+    assert [local.allow_inbound(ws) for _ in range(3)] == [True, True, False]
+    assert local.queue_stats()["throttled_messages"] == 1
+    local.disconnect(ws)
@@ -0,0 +1,42 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("psutil")
+pytest.importorskip("websockets")
+
+BENCHMARK = Path(__file__).resolve().parents[2] / "tests" / "ws_benchmark.py"
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_benchmark_smoke_with_heartbeats(tmp_path):
+    output = tmp_path / "results.json"
+    env = {
+        **os.environ,
+        # Heartbeat idle sockets several times during the run
+        "WS_PING_INTERVAL": "0.2",
+        "WS_PONG_TIMEOUT": "0.5",
+        "WS_HEARTBEAT_TICK": "0.05",
+    }
+    subprocess.run([
+        sys.executable, str(BENCHMARK), "--port", str(_free_port()),
+        "--clients", "20", "--duration", "3", "--grace", "1", "--content-rate", "1",
+        "--typers", "2", "--presence-rate", "2", "--min-delivery-ratio", "1.0",
+        "--output", str(output),
+    ], env=env, check=True, timeout=120, stdout=subprocess.DEVNULL)
+
+    results = json.loads(output.read_text())
+    ws_stats = results["server"]["ws_stats"]
+    assert results["targets"] == {"passed": True, "failures": []}
+    assert results["connections"]["established"] == 20
+    assert results["throughput"]["received"].get("heartbeat", 0) > 0
+    assert ws_stats["pings_sent"] > 0
+    assert ws_stats["stale_disconnects"] == 0
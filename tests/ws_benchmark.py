@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+
+"""
+Content Aggregator Platform - WebSocket Fan-out Benchmark
+
+Opens many concurrent WebSocket clients, drives content, typing and presence
+traffic through the real-time layer and prints the results as JSON:
+delivery latency percentiles, messages per second, server RSS per
+connection and event-loop lag.
+
+    python tests/ws_benchmark.py --clients 2000 --duration 30
+    python tests/ws_benchmark.py --url http://localhost:8000 --server-pid 4242
+
+Without --url a local uvicorn is started on a scratch SQLite database. With
+any --max-*/--min-* target set, the exit status is 1 when a target is
+missed, so runs can gate ConnectionManager changes.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+import psutil
+from websockets.asyncio.client import connect
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "count": len(ordered),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 2),
+    }
+
+def raise_file_limit(needed: int) -> int:
+    """Every client is a socket here and another one in the server"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+    if wanted > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+    return max(soft, wanted)
+
+class LocalServer:
+    """uvicorn on a scratch database, for runs without --url"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.tmpdir = tempfile.TemporaryDirectory(prefix="ws-bench-")
+        self.process: Optional[subprocess.Popen] = None
+
+    async def start(self, timeout: float = 60) -> None:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{self.tmpdir.name}/bench.db"
+        env.pop("ASYNC_DATABASE_URL", None)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + timeout
+        async with aiohttp.ClientSession() as session:
+            while time.monotonic() < deadline:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {self.process.returncode}")
+                try:
+                    async with session.get(f"{self.url}/health") as response:
+                        if response.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.25)
+        raise RuntimeError("uvicorn did not become healthy in time")
+
+    def stop(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.tmpdir.cleanup()
+
+class Recorder:
+    """Shared counters and samples for every client"""
+
+    def __init__(self):
+        self.latency_ms: Dict[str, List[float]] = {"content": [], "editing": []}
+        self.ping_rtt_ms: List[float] = []
+        self.loop_lag_ms: List[float] = []
+        self.received: Dict[str, int] = {}
+        self.sent: Dict[str, int] = {"content": 0, "keystrokes": 0, "presence": 0}
+
+    def on_message(self, message: dict) -> None:
+        now_ns = time.time_ns()
+        kind = message.get("type", "unknown")
+        self.received[kind] = self.received.get(kind, 0) + 1
+        if kind == "content_created":
+            title = message.get("data", {}).get("title", "")
+            if title.startswith("bench "):
+                self.latency_ms["content"].append((now_ns - int(title.split()[1])) / 1e6)
+        elif kind == "user_editing_content":
+            sent_us = message.get("data", {}).get("cursor_position")
+            if isinstance(sent_us, int):
+                self.latency_ms["editing"].append((now_ns / 1000 - sent_us) / 1000)
+        elif kind == "pong" and isinstance(message.get("timestamp"), int):
+            self.ping_rtt_ms.append((now_ns - message["timestamp"]) / 1e6)
+
+class Benchmark:
+    def __init__(self, args: argparse.Namespace, base_url: str):
+        self.args = args
+        self.base_url = base_url.rstrip("/")
+        self.ws_url = self.base_url.replace("http", "ws", 1)
+        self.recorder = Recorder()
+        self.sockets: List = []
+        self.room_sockets: List = []
+        self.failed_connections = 0
+        self.headers: Dict[str, str] = {}
+        self.token: Optional[str] = None
+        self.content_id: Optional[int] = None
+        self.running = True
+
+    async def setup_user(self, session: aiohttp.ClientSession) -> None:
+        name = f"bench{uuid.uuid4().hex[:10]}"
+        password = "benchpass123"
+        await session.post(f"{self.base_url}/api/v1/auth/register", json={
+            "email": f"{name}@example.com", "username": name, "password": password
+        })
+        async with session.post(f"{self.base_url}/api/v1/auth/token", data={
+            "username": name, "password": password
+        }) as response:
+            self.token = (await response.json())["access_token"]
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+        async with session.post(f"{self.base_url}/api/v1/content", headers=self.headers, json={
+            "title": "Benchmark room", "content_type": "note"
+        }) as response:
+            self.content_id = (await response.json())["id"]
+
+    async def open_client(self, in_room: bool, limiter: asyncio.Semaphore) -> None:
+        async with limiter:
+            try:
+                ws = await connect(
+                    f"{self.ws_url}/api/v1/ws?token={self.token}",
+                    open_timeout=30,
+                    ping_interval=None,
+                    max_queue=None,
+                )
+                await ws.recv()  # connection_established
+                if in_room:
+                    await ws.send(json.dumps({"type": "subscribe", "data": {"room": f"content:{self.content_id}"}}))
+                    await ws.recv()
+            except Exception:
+                self.failed_connections += 1
+                return
+        self.sockets.append(ws)
+        if in_room:
+            self.room_sockets.append(ws)
+        asyncio.create_task(self.receive(ws))
+
+    async def receive(self, ws) -> None:
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                self.recorder.on_message(message)
+                # Answer heartbeats like a real client, or the server reaps the socket
+                if message.get("type") == "heartbeat":
+                    await ws.send(json.dumps({"type": "pong"}))
+        except Exception:
+            pass
+
+    async def drive_content(self, session: aiohttp.ClientSession) -> None:
+        interval = 1 / self.args.content_rate
+        while self.running:
+            started = time.monotonic()
+            try:
+                await session.post(f"{self.base_url}/api/v1/content", headers=self.headers, json={
+                    "title": f"bench {time.time_ns()}", "content_type": "note"
+                })
+                self.recorder.sent["content"] += 1
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(max(0, interval - (time.monotonic() - started)))
+
+    async def drive_typing(self, ws) -> None:
+        interval = 1 / self.args.keystroke_rate
+        typing = False
+        while self.running:
+            typing = not typing
+            try:
+                await ws.send(json.dumps({"type": "typing_indicator", "data": {
+                    "content_id": self.content_id, "is_typing": typing
+                }}))
+                await ws.send(json.dumps({"type": "user_editing_content", "data": {
+                    "content_id": self.content_id, "field": "content_text",
+                    "cursor_position": time.time_ns() // 1000
+                }}))
+                self.recorder.sent["keystrokes"] += 1
+            except Exception:
+                return
+            await asyncio.sleep(interval)
+
+    async def drive_presence(self) -> None:
+        interval = 1 / self.args.presence_rate
+        while self.running:
+            ws = random.choice(self.room_sockets)
+            try:
+                await ws.send(json.dumps({"type": "user_viewing_content", "data": {"content_id": self.content_id}}))
+                self.recorder.sent["presence"] += 1
+            except Exception:
+                pass
+            await asyncio.sleep(interval)
+
+    async def probe_server_lag(self, ws) -> None:
+        """Ping round trips: time the server's loop takes to get to a trivial message"""
+        while self.running:
+            try:
+                await ws.send(json.dumps({"type": "ping", "timestamp": time.time_ns()}))
+            except Exception:
+                return
+            await asyncio.sleep(0.1)
+
+    async def monitor_client_lag(self) -> None:
+        """Overshoot of a short sleep here, to tell when the benchmark itself is the bottleneck"""
+        while self.running:
+            started = time.monotonic()
+            await asyncio.sleep(0.05)
+            self.recorder.loop_lag_ms.append(max(0.0, (time.monotonic() - started - 0.05) * 1000))
+
+    async def run(self, server_pid: Optional[int]) -> dict:
+        args = self.args
+        server = psutil.Process(server_pid) if server_pid else None
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            await self.setup_user(session)
+            rss_idle = server.memory_info().rss if server else None
+
+            limiter = asyncio.Semaphore(args.connect_concurrency)
+            room_members = max(1, int(args.clients * args.room_share))
+            connect_started = time.monotonic()
+            await asyncio.gather(*[
+                self.open_client(i < room_members, limiter) for i in range(args.clients)
+            ])
+            connect_seconds = time.monotonic() - connect_started
+            rss_loaded = server.memory_info().rss if server else None
+
+            drivers = [
+                asyncio.create_task(self.monitor_client_lag()),
+                asyncio.create_task(self.drive_content(session)),
+            ]
+            if self.sockets:
+                drivers.append(asyncio.create_task(self.probe_server_lag(self.sockets[-1])))
+            if self.room_sockets:
+                drivers.append(asyncio.create_task(self.drive_presence()))
+                drivers += [
+                    asyncio.create_task(self.drive_typing(ws))
+                    for ws in self.room_sockets[:args.typers]
+                ]
+
+            traffic_started = time.monotonic()
+            await asyncio.sleep(args.duration)
+            self.running = False
+            await asyncio.sleep(args.grace)  # let in-flight deliveries land
+            elapsed = time.monotonic() - traffic_started
+            for task in drivers:
+                task.cancel()
+            rss_peak = server.memory_info().rss if server else None
+
+            async with session.get(f"{self.base_url}/api/v1/ws/stats") as response:
+                ws_stats = await response.json()
+
+        await asyncio.gather(*[ws.close() for ws in self.sockets], return_exceptions=True)
+        return self.report(connect_seconds, elapsed, rss_idle, rss_loaded, rss_peak, ws_stats)
+
+    def report(self, connect_seconds, elapsed, rss_idle, rss_loaded, rss_peak, ws_stats) -> dict:
+        recorder = self.recorder
+        established = len(self.sockets)
+        total_received = sum(recorder.received.values())
+        expected_content = recorder.sent["content"] * established
+        server = {"ws_stats": ws_stats, "ping_rtt_ms": percentiles(recorder.ping_rtt_ms)}
+        if rss_idle is not None:
+            server.update({
+                "rss_mb_idle": round(rss_idle / 2**20, 1),
+                "rss_mb_loaded": round(rss_loaded / 2**20, 1),
+                "rss_mb_peak": round(rss_peak / 2**20, 1),
+                "rss_kb_per_connection": round((rss_loaded - rss_idle) / 1024 / established, 2) if established else None,
+            })
+        return {
+            "config": {k: v for k, v in vars(self.args).items() if not k.startswith("max_") and not k.startswith("min_")},
+            "connections": {
+                "requested": self.args.clients,
+                "established": established,
+                "failed": self.failed_connections,
+                "room_members": len(self.room_sockets),
+                "connect_seconds": round(connect_seconds, 2),
+            },
+            "latency_ms": {kind: percentiles(samples) for kind, samples in recorder.latency_ms.items()},
+            "throughput": {
+                "sent": recorder.sent,
+                "received": recorder.received,
+                "messages_per_second": round(total_received / elapsed, 1) if elapsed else 0.0,
+                "content_delivery_ratio": round(recorder.received.get("content_created", 0) / expected_content, 4) if expected_content else None,
+            },
+            "server": server,
+            "client_loop_lag_ms": percentiles(recorder.loop_lag_ms),
+        }
+
+def check_targets(results: dict, args: argparse.Namespace) -> List[str]:
+    failures = []
+    content_p99 = results["latency_ms"]["content"].get("p99")
+    if args.max_p99_ms is not None and (content_p99 is None or content_p99 > args.max_p99_ms):
+        failures.append(f"content p99 {content_p99} ms > {args.max_p99_ms} ms")
+    ratio = results["throughput"]["content_delivery_ratio"]
+    if args.min_delivery_ratio is not None and (ratio is None or ratio < args.min_delivery_ratio):
+        failures.append(f"content delivery ratio {ratio} < {args.min_delivery_ratio}")
+    per_conn = results["server"].get("rss_kb_per_connection")
+    if args.max_rss_kb_per_connection is not None and per_conn is not None and per_conn > args.max_rss_kb_per_connection:
+        failures.append(f"RSS per connection {per_conn} KB > {args.max_rss_kb_per_connection} KB")
+    lag_p99 = results["server"]["ping_rtt_ms"].get("p99")
+    if args.max_ping_rtt_ms is not None and (lag_p99 is None or lag_p99 > args.max_ping_rtt_ms):
+        failures.append(f"ping RTT p99 {lag_p99} ms > {args.max_ping_rtt_ms} ms")
+    if results["connections"]["failed"]:
+        failures.append(f"{results['connections']['failed']} connections failed")
+    stale = results["server"]["ws_stats"].get("stale_disconnects")
+    if stale:
+        failures.append(f"{stale} connections reaped as stale")
+    return failures
+
+async def main_async(args: argparse.Namespace) -> dict:
+    raise_file_limit(args.clients * 2 + 1024)
+    server = None
+    base_url, server_pid = args.url, args.server_pid
+    if base_url is None:
+        server = LocalServer(args.port)
+        await server.start()
+        base_url, server_pid = server.url, server.process.pid
+    try:
+        results = await Benchmark(args, base_url).run(server_pid)
+    finally:
+        if server:
+            server.stop()
+    failures = check_targets(results, args)
+    results["targets"] = {"passed": not failures, "failures": failures}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket fan-out benchmark")
+    parser.add_argument("--url", help="API base URL; a local uvicorn is started when omitted")
+    parser.add_argument("--server-pid", type=int, help="Server process to sample RSS from (with --url)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the local server")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of traffic")
+    parser.add_argument("--grace", type=float, default=2.0, help="Seconds to wait for in-flight messages")
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--room-share", type=float, default=0.25, help="Fraction of clients watching the content room")
+    parser.add_argument("--typers", type=int, default=10, help="Room members sending keystrokes")
+    parser.add_argument("--content-rate", type=float, default=5.0, help="content_created events per second")
+    parser.add_argument("--keystroke-rate", type=float, default=8.0, help="Keystrokes per second per typer")
+    parser.add_argument("--presence-rate", type=float, default=20.0, help="Presence messages per second")
+    parser.add_argument("--max-p99-ms", type=float, help="Target: content delivery p99")
+    parser.add_argument("--min-delivery-ratio", type=float, help="Target: delivered/expected content events")
+    parser.add_argument("--max-rss-kb-per-connection", type=float, help="Target: server memory per connection")
+    parser.add_argument("--max-ping-rtt-ms", type=float, help="Target: ping round trip p99 (server loop lag)")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    encoded = json.dumps(results, indent=2)
+    print(encoded)
+    if args.output:
+        Path(args.output).write_text(encoded)
+    has_targets = any(
+        getattr(args, name) is not None
+        for name in ("max_p99_ms", "min_delivery_ratio", "max_rss_kb_per_connection", "max_ping_rtt_ms")
+    )
+    sys.exit(1 if has_targets and not results["targets"]["passed"] else 0)
+
+if __name__ == "__main__":
+    main()